@@ -0,0 +1,870 @@
+#!/usr/bin/python3
+
+##########      benchmark.py     ##########
+"""
+This script measures the stages of sqlite_parser.py (regexes, headers decoding, 
+inserts, carving of a corpus with planted records, window boundaries, linked files) 
+and prints their throughput and the records they find.
+"""
+
+
+
+import argparse, sys, os, time, random, sqlite3, tempfile, struct, mmap, json, subprocess
+import regex as re
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import varint
+
+
+
+
+#Function that returns a list of fake records (table, values) with information columns, text, integer, real and blob values
+def fake_records(number, seed=0):
+    rng = random.Random(seed)
+    records = []
+
+    for n in range(number):
+        text = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz' -") for x in range(rng.randint(5, 80)))
+        blob = bytes(rng.getrandbits(8) for x in range(rng.randint(0, 32)))
+        records.append(('benchmark', ('Scenario 0 : non-deleted or non-overwritten (journal files) records', str(n), 'benchmark.bin', n, text, rng.random(), blob)))
+
+    return records
+
+
+
+
+#Function that creates the benchmark output database and returns its connection, with the same PRAGMA as sqlite_parser.py
+def benchmark_database(path):
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute("CREATE TABLE benchmark (carved_record_id INTEGER PRIMARY KEY AUTOINCREMENT, carving_scenario_number TEXT, carved_record_offset INTEGER, carved_record_file TEXT, id INTEGER, text TEXT, number REAL, data BLOB)")
+    return connection
+
+
+
+
+#Function that inserts records the old way : one INSERT statement per record, values rendered as SQL text
+def insert_literal(connection, records):
+    connection.execute("BEGIN TRANSACTION")
+
+    for table, values in records:
+        values = [str(value).replace("'", "''") for value in values]
+        statement = "INSERT INTO " + table + " (carving_scenario_number, carved_record_offset, carved_record_file, id, text, number, data) VALUES ('" + "', '".join(values) + "')"
+        connection.execute(statement)
+
+    connection.commit()
+
+
+
+
+#Function that inserts records with the prepared INSERT statement of the table and executemany
+def insert_executemany(connection, records):
+    import sqlite_parser
+
+    insert_statements = {'benchmark':'INSERT INTO benchmark ("carving_scenario_number", "carved_record_offset", "carved_record_file", "id", "text", "number", "data") VALUES (?, ?, ?, ?, ?, ?, ?)'}
+    connection.execute("BEGIN TRANSACTION")
+    sqlite_parser.insert_records(connection, insert_statements, records)
+    connection.commit()
+
+
+
+
+#Function that benchmarks the insertion of records in the output database (rows per second)
+def benchmark_insert(args):
+    records = fake_records(args.rows)
+
+    for name, function in [('literal SQL execute', insert_literal), ('prepared executemany', insert_executemany)]:
+        with tempfile.TemporaryDirectory() as directory:
+            connection = benchmark_database(os.path.join(directory, 'benchmark.db'))
+            start = time.perf_counter()
+            function(connection, records)
+            duration = time.perf_counter() - start
+            connection.close()
+
+        print('%-22s %10d rows/s' % (name, len(records) / duration))
+
+
+
+
+#Function that decodes Huffman coding (legacy decoder, reference of the equivalence check)
+def huffmanEncoding(x,y):
+    x = int(x)
+    z = (x-128)*128
+    a = z + int(y)
+    
+    return(hex(a))
+
+
+
+
+#Function that translates SQLite serial types identifyings used in serial types array into their real value (legacy decoder, reference of the equivalence check)
+def serialTypes(serial_type):
+    _serial_type = 0
+    if serial_type == 5:
+        _serial_type = 6
+    elif serial_type == 6:
+        _serial_type = 8
+    elif serial_type == 7:
+        _serial_type = 8
+    elif serial_type == 8:
+        _serial_type = 0
+    elif serial_type == 9:
+        _serial_type = 0
+    elif serial_type >= 12 and serial_type % 2 == 0:
+        _serial_type = round((serial_type-12)/2)
+    elif serial_type >= 13 and serial_type % 2 != 0:
+        _serial_type = round((serial_type-13)/2)
+    else:
+        _serial_type = serial_type
+
+    return _serial_type
+
+
+
+
+#Function that decodes a header byte by byte with the legacy nested ladder of sqlite_parser.py and config.py (reference of the equivalence check)
+def legacy_decode_header(mm, a, b, len_start_header, freeblock):
+    unknown_header, unknown_header_2, limit = [], [], []
+
+    #Until end of the match
+    count = 0
+
+    #Go to start of the match
+    mm.seek(a)
+    
+    #If the record is overwritten by a freeblock, read 2 bytes (next freeblock offset) then 2 bytes (length of this freeblock)
+    if freeblock:
+        byte = int(struct.unpack('>H', mm.read(2))[0])
+        unknown_header.append(byte)
+        unknown_header_2.append(byte)
+        count+=2
+        
+        byte = int(struct.unpack('>H', mm.read(2))[0])
+        unknown_header.append(byte)
+        unknown_header_2.append(byte)
+        count+=2
+
+
+    #While not end of the match
+    while count <= (b-a-1):
+        
+        #Before serial types part (start header length): append(byte) to unknown_header
+        if len(unknown_header) < len_start_header:
+
+            #Read byte by byte, convert in integer, and append to unknown_header list
+            byte = int(struct.unpack('>B', mm.read(1))[0])
+           
+            #If byte < 0x80
+            if byte < 128:
+                unknown_header.append(byte)
+                unknown_header_2.append(byte)
+                count+=1
+            
+            #Else, handle Huffman encoding until 9 successive bytes
+            else:
+                cont1 = int(struct.unpack('>B', mm.read(1))[0])
+                byte1 = int(huffmanEncoding(byte, cont1),16)
+                if cont1 < 128:
+                    unknown_header.append(byte1)
+                    unknown_header_2.append(byte1)
+                    count+=2
+                else:
+                    cont2 = int(struct.unpack('>B', mm.read(1))[0])
+                    byte2 = int(huffmanEncoding(byte1, cont2),16)
+                    count+=2
+                    if cont2 < 128:
+                        unknown_header.append(byte2)
+                        unknown_header_2.append(byte2)
+                        count+=1
+                    else:
+                        count+=1
+                        cont3 = int(struct.unpack('>B', mm.read(1))[0])
+                        byte3 = int(huffmanEncoding(byte2, cont3),16)
+                        if cont3 < 128:
+                            unknown_header.append(byte3)
+                            unknown_header_2.append(byte3)
+                            count+=1
+                        else:
+                            count+=1
+                            cont4 = int(struct.unpack('>B', mm.read(1))[0])
+                            byte4 = int(huffmanEncoding(byte3, cont4),16)
+                            if cont4 < 128:
+                                unknown_header.append(byte4)
+                                unknown_header_2.append(byte4)
+                                count+=1
+                            else:
+                                count+=1
+                                cont5 = int(struct.unpack('>B', mm.read(1))[0])
+                                byte5 = int(huffmanEncoding(byte4, cont5),16)
+                                if cont5 < 128:
+                                    unknown_header.append(byte5)
+                                    unknown_header_2.append(byte5)
+                                    count+=1
+                                else:
+                                    count+=1
+                                    cont6 = int(struct.unpack('>B', mm.read(1))[0])
+                                    byte6 = int(huffmanEncoding(byte5, cont6),16)
+                                    if cont6 < 128:
+                                        unknown_header.append(byte6)
+                                        unknown_header_2.append(byte6)
+                                        count+=1
+                                    else:
+                                        count+=1
+                                        cont7 = int(struct.unpack('>B', mm.read(1))[0])
+                                        byte7 = int(huffmanEncoding(byte6, cont7),16)
+                                        if cont7 < 128:
+                                            unknown_header.append(byte7)
+                                            unknown_header_2.append(byte7)
+                                            count+=1
+                                        else:
+                                            count+=1
+                                            cont8 = int(struct.unpack('>B', mm.read(1))[0])
+                                            byte8 = int(huffmanEncoding(byte7, cont8),16)
+                                            if cont8 < 128:
+                                                unknown_header.append(byte8)
+                                                unknown_header_2.append(byte8)
+                                                count+=1
+                                            else:
+                                                count+=1
+                                                byte9 = int(huffmanEncoding(byte7, cont8),16)
+                                                unknown_header.append(byte9)
+                                                unknown_header_2.append(byte9)
+        
+        
+        #Serial types part : append(serialTypes(byte)) to unknown_header and not decoded bytes to unknown_header_2
+        else:
+            
+            #Append limit to list of limits to know how many bytes takes the start of the header (because 3 integers are not necessarily only 3 bytes)
+            limit.append(count)
+            
+            #Read byte by byte, convert in integer, and append to unknown_header list
+            byte = int(struct.unpack('>B', mm.read(1))[0])
+            
+            #If byte < 0x80
+            if byte < 128:
+                unknown_header.append(serialTypes(byte))
+                unknown_header_2.append(byte)
+                count+=1
+            
+            #Else, handle Huffman encoding until 9 successive bytes
+            else:
+                cont1 = int(struct.unpack('>B', mm.read(1))[0])
+                byte1 = int(huffmanEncoding(byte, cont1),16)
+                if cont1 < 128:
+                    unknown_header.append(serialTypes(byte1))
+                    unknown_header_2.append(byte1)
+                    count+=2
+                else:
+                    cont2 = int(struct.unpack('>B', mm.read(1))[0])
+                    byte2 = int(huffmanEncoding(byte1, cont2),16)
+                    count+=2
+                    if cont2 < 128:
+                        unknown_header.append(serialTypes(byte2))
+                        unknown_header_2.append(byte2)
+                        count+=1
+                    else:
+                        count+=1
+                        cont3 = int(struct.unpack('>B', mm.read(1))[0])
+                        byte3 = int(huffmanEncoding(byte2, cont3),16)
+                        if cont3 < 128:
+                            unknown_header.append(serialTypes(byte3))
+                            unknown_header_2.append(byte3)
+                            count+=1
+                        else:
+                            count+=1
+                            cont4 = int(struct.unpack('>B', mm.read(1))[0])
+                            byte4 = int(huffmanEncoding(byte3, cont4),16)
+                            if cont4 < 128:
+                                unknown_header.append(serialTypes(byte4))
+                                unknown_header_2.append(byte4)
+                                count+=1
+                            else:
+                                count+=1
+                                cont5 = int(struct.unpack('>B', mm.read(1))[0])
+                                byte5 = int(huffmanEncoding(byte4, cont5),16)
+                                if cont5 < 128:
+                                    unknown_header.append(serialTypes(byte5))
+                                    unknown_header_2.append(byte5)
+                                    count+=1
+                                else:
+                                    count+=1
+                                    cont6 = int(struct.unpack('>B', mm.read(1))[0])
+                                    byte6 = int(huffmanEncoding(byte5, cont6),16)
+                                    if cont6 < 128:
+                                        unknown_header.append(serialTypes(byte6))
+                                        unknown_header_2.append(byte6)
+                                        count+=1
+                                    else:
+                                        count+=1
+                                        cont7 = int(struct.unpack('>B', mm.read(1))[0])
+                                        byte7 = int(huffmanEncoding(byte6, cont7),16)
+                                        if cont7 < 128:
+                                            unknown_header.append(serialTypes(byte7))
+                                            unknown_header_2.append(byte7)
+                                            count+=1
+                                        else:
+                                            count+=1
+                                            cont8 = int(struct.unpack('>B', mm.read(1))[0])
+                                            byte8 = int(huffmanEncoding(byte7, cont8),16)
+                                            if cont8 < 128:
+                                                unknown_header.append(serialTypes(byte8))
+                                                unknown_header_2.append(byte8)
+                                                count+=1
+                                            else:
+                                                count+=1
+                                                byte9 = int(huffmanEncoding(byte7, cont8),16)
+                                                unknown_header.append(serialTypes(byte9))
+                                                unknown_header_2.append(byte9)
+
+    return unknown_header, unknown_header_2, limit
+
+
+
+
+#Function that encodes an integer as a SQLite varint of at most 8 bytes
+def encode_varint(value):
+    groups = [value & 0x7f]
+    value >>= 7
+    while value:
+        groups.append((value & 0x7f) | 0x80)
+        value >>= 7
+
+    return bytes(reversed(groups))
+
+
+
+
+#Function that returns a buffer of random record headers (separated by random payload bytes) and the (start, end, len_start_header, freeblock) of each header
+#Varints take 1 to 8 bytes and are < 2^53 : 9-byte varints and serial types rounded as floats are decoded correctly by varint.py but not by the legacy decoder
+def fake_headers(number, seed=0):
+    rng = random.Random(seed)
+    buffer, headers = bytearray(), []
+    
+    for n in range(number):
+        freeblock = rng.random() < 0.5
+        len_start_header = rng.randint(2, 4) if freeblock else 3
+        start = len(buffer)
+        
+        if freeblock:
+            buffer += bytes(rng.getrandbits(8) for x in range(4))
+        
+        #Start of the header, then serial types : mostly one-byte varints, sometimes longer
+        for x in range(len_start_header - (2 if freeblock else 0) + rng.randint(1, 20)):
+            if rng.random() < 0.8:
+                buffer += encode_varint(rng.randint(0, 127))
+            else:
+                buffer += encode_varint(rng.getrandbits(rng.randint(8, 53)))
+        
+        headers.append((start, len(buffer), len_start_header, freeblock))
+        buffer += bytes(rng.getrandbits(8) for x in range(rng.randint(0, 16)))
+
+    return bytes(buffer), headers
+
+
+
+
+#Function that checks that varint.decode_header returns the same headers as the legacy decoder, and benchmarks both (headers per second)
+def benchmark_header(args):
+    buffer, headers = fake_headers(args.headers)
+    mm = mmap.mmap(-1, len(buffer))
+    mm.write(buffer)
+
+    #Equivalence check
+    mismatches = 0
+    for a, b, len_start_header, freeblock in headers:
+        if legacy_decode_header(mm, a, b, len_start_header, freeblock) != varint.decode_header(mm, a, b, len_start_header, freeblock):
+            mismatches += 1
+    print('%d headers decoded, %d mismatches with the legacy decoder' % (len(headers), mismatches))
+
+    for name, function in [('legacy ladder', legacy_decode_header), ('varint.decode_header', varint.decode_header)]:
+        start = time.perf_counter()
+        for a, b, len_start_header, freeblock in headers:
+            function(mm, a, b, len_start_header, freeblock)
+        duration = time.perf_counter() - start
+
+        print('%-22s %10d headers/s' % (name, len(headers) / duration))
+
+    mm.close()
+
+    if mismatches:
+        sys.exit(1)
+
+
+
+
+#Function that checks that records starting near the end of a window are found as with one window for the whole file (exit code 1 otherwise) : 
+#a table whose BLOB column is followed by a TEXT column has a payload lookahead that can read far after the record header (e.g. through zero-filled blobs)
+def benchmark_boundary(args):
+    rng = random.Random(args.seed)
+    parser_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sqlite_parser.py')
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, 'items.db')
+        connection = sqlite3.connect(database)
+        connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, data BLOB NOT NULL, name TEXT NOT NULL)')
+        for n in range(args.rows):
+            length = rng.randint(20, 3000)
+            data = bytes(length) if n % 2 else bytes(rng.getrandbits(8) for x in range(length))
+            connection.execute('INSERT INTO items VALUES (?, ?, ?)', (n + 1, data, 'name %d' % n))
+        connection.commit()
+        connection.close()
+        subprocess.run([sys.executable, os.path.join(os.path.dirname(parser_path), 'config.py'), '-i', database, '-o', directory], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        #Records of the whole file in one window, then with small windows and each access to the files
+        results = []
+        for window_size, access in [(64, 'auto')] + [(window_size, access) for window_size in args.window_sizes for access in ('mmap', 'read')]:
+            output = os.path.join(directory, 'output_%s_%s' % (window_size, access)) + os.sep
+            os.makedirs(output)
+            subprocess.run([sys.executable, parser_path, '-c', os.path.join(directory, 'config_items.json'), '-i', database, '-s', str(window_size), '-b', access, '-e', '0', '-o', output], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            connection = sqlite3.connect(os.path.join(output, 'output_items.db'))
+            records = sorted(connection.execute('SELECT carving_scenario_number, carved_record_offset, id, data, name FROM items'))
+            connection.close()
+            results.append(records)
+            print('window of %-6s MB, access %-4s : %d records' % (window_size, access, len(records)))
+
+    if any(records != results[0] for records in results):
+        print('Records differ from the records found with one window')
+        sys.exit(1)
+
+
+
+
+#Function that checks that --linked (True by default) carves the files of a directory whose name contains the database name of the config file (legacy selection), 
+#and the same records per table as these files carved with --linked False (exit code 1 otherwise)
+def benchmark_linked(args):
+    import sqlite_parser
+
+    linked_file = args.config[args.config.find('config_') + len('config_'):args.config.find('.json')]
+    expected = sorted(os.path.join(parent, fn) for parent, dirnames, filenames in os.walk(args.input) for fn in filenames if linked_file in fn)
+    selected = sorted(open_file for mainfile, open_file, file_configs, kind in sqlite_parser.ingest_files([args.input], [args.config], True))
+    print('%d files linked to %s: %s' % (len(selected), linked_file, ', '.join(os.path.basename(path) for path in selected)))
+
+    parser_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sqlite_parser.py')
+    counts = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, options in [('linked', ['-i', args.input]), ('legacy', ['-i'] + expected + ['-l', 'False'])]:
+            output = os.path.join(directory, name) + os.sep
+            os.makedirs(output)
+            subprocess.run([sys.executable, parser_path, '-c', args.config, '-o', output, '-e', '0'] + options, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            tables = {}
+            for output_db in os.listdir(output):
+                connection = sqlite3.connect(os.path.join(output, output_db))
+                for (table,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'carved\\_%' ESCAPE '\\' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"):
+                    tables[table] = connection.execute('SELECT COUNT(*) FROM "%s"' % table).fetchone()[0]
+                connection.close()
+            counts.append(tables)
+            print('%-7s %s' % (name, ', '.join('%s %d records' % item for item in sorted(tables.items()))))
+
+    if selected != expected or counts[0] != counts[1]:
+        print('Files or records differ from the legacy selection')
+        sys.exit(1)
+
+
+
+
+#Ranges of rowids whose varint takes 1, 2, 3 and more bytes : with the payload length, they decide which bytes of a deleted record the freeblock overwrites (scenario)
+rowids_ranges = [(1, 127), (128, 16383), (16384, 2097151), (2097152, 2**40)]
+
+#Number of TEXT columns of the wide table : with texts of 58+ characters (2-byte serial types), its serial types array is longer than 127 bytes (2-byte varint), needed for scenario 4
+wide_columns = 64
+
+#Regex of the unique token planted in each record (ground truth)
+token_regex = re.compile(r'tok[0-9]{8}')
+
+
+
+
+#Function that returns the scenario of a deleted record whose first 4 bytes are overwritten by a freeblock, from the lengths of its first varints
+#(payload length, rowid, serial types array length and type 1)
+def expected_scenario(payload_length, rowid, header_length, type1_length=1):
+    p, r, h = [len(encode_varint(value)) for value in (payload_length, rowid, header_length)]
+
+    if p + r > 4:
+        return 5
+    elif p + r == 4:
+        return 3
+    elif p + r + h > 4:
+        return 4
+    elif p + r + h == 4:
+        return 2
+    elif p + r + h + type1_length == 4:
+        return 1
+    
+    return None
+
+
+
+
+#Function that returns the length of the payload and of the serial types array of a record, from its values
+def record_lengths(values):
+    types = []
+    for value in values:
+        if value is None:
+            types.append(0)
+        elif isinstance(value, float):
+            types.append(7)
+        elif isinstance(value, int):
+            types.append(1 if -128 <= value < 128 else (2 if -32768 <= value < 32768 else (3 if -2**23 <= value < 2**23 else (4 if -2**31 <= value < 2**31 else 6))))
+        else:
+            types.append(len(value.encode('utf-8')) * 2 + 13)
+    
+    header = sum(len(encode_varint(serial_type)) for serial_type in types)
+    header += len(encode_varint(header + 1))
+    
+    return header + sum(varint.serial_type_length(serial_type) for serial_type in types), header
+
+
+
+
+#Function that returns the values of a planted record of the messages or wide table, for a scenario (None : intact record)
+def planted_record(rng, token, scenario, rowids):
+    
+    #Text long enough (payload length on 2 bytes) for scenarios 2-5, short for scenario 1
+    if scenario == 1:
+        body = token + ' ' + ''.join(rng.choice('abcdefghij ') for x in range(rng.randint(5, 30)))
+    else:
+        body = token + ' ' + ''.join(rng.choice('abcdefghij ') for x in range(rng.randint(150, 600)))
+    
+    #Rowid range of the scenario
+    if scenario in (1, 2, 4):
+        rowid_range = 0
+    elif scenario == 3:
+        rowid_range = 1
+    elif scenario == 5:
+        rowid_range = 2
+    else:
+        rowid_range = 3
+    
+    #Unused rowid of the range
+    table = 'wide' if scenario == 4 else 'messages'
+    low, high = rowids_ranges[rowid_range]
+    for x in range(100):
+        rowid = rng.randint(low, high)
+        if (table, rowid) not in rowids:
+            break
+    else:
+        return None
+    rowids.add((table, rowid))
+
+    if table == 'wide':
+        values = [None, token] + [''.join(rng.choice('abcdefghij') for x in range(58)) for x in range(wide_columns)]
+    else:
+        values = [None, token, rng.randint(10**11, 10**12), body, rng.randint(0, 1), rng.random() * 100]
+    
+    return table, rowid, values
+
+
+
+
+#Function that creates a database (+ rollback journal, or + WAL) with intact, deleted, journal-only or WAL-only planted records and adds them to the ground truth
+def build_database(path, rng, truth, tokens, records, deleted, wal=False):
+    for extension in ('', '-journal', '-wal', '-shm'):
+        if os.path.exists(path + extension):
+            os.remove(path + extension)
+
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("PRAGMA page_size=4096")
+    connection.execute("PRAGMA secure_delete=OFF")
+    connection.execute("PRAGMA auto_vacuum=NONE")
+    connection.execute("PRAGMA journal_mode=%s" % ('WAL' if wal else 'PERSIST'))
+    connection.execute("PRAGMA wal_autocheckpoint=0")
+    connection.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, address TEXT, date INTEGER, body TEXT, read INTEGER, score REAL)")
+    connection.execute("CREATE TABLE wide (id INTEGER PRIMARY KEY, note TEXT, %s)" % ', '.join(['c%d TEXT' % n for n in range(wide_columns)]))
+    
+    name = os.path.basename(path)
+    rowids, planted = set(), []
+
+    #Records planted in the database, then in the rollback journal (old versions of updated records) or in the WAL (not checkpointed)
+    for step in (('database', 'wal') if wal else ('database', 'journal')):
+        file_name = name + ('-wal' if step == 'wal' else '')
+        connection.execute("BEGIN")
+
+        #Old versions of updated records are only left in the rollback journal
+        if step == 'journal':
+            for table, rowid, token in planted[:len(planted)//2]:
+                new_token = 'tok%08d' % next(tokens)
+                if table == 'wide':
+                    connection.execute("UPDATE wide SET note = replace(note, ?, ?) WHERE id = ?", (token, new_token, rowid))
+                else:
+                    connection.execute("UPDATE messages SET address = replace(address, ?, ?), body = replace(body, ?, ?) WHERE id = ?", (token, new_token, token, new_token, rowid))
+                #Old version only in the journal, new version intact in the database
+                truth.remove([token, 'intact', 0, name])
+                truth.append([token, 'journal', 0, name + '-journal'])
+                truth.append([new_token, 'intact', 0, name])
+        
+        else:
+            to_delete = []
+            for n in range(records):
+                scenario = rng.randint(1, 5) if rng.random() < deleted else None
+                token = 'tok%08d' % next(tokens)
+                record = planted_record(rng, token, scenario, rowids)
+                if record is None:
+                    continue
+                table, rowid, values = record
+                
+                values[0] = rowid
+                connection.execute("INSERT INTO %s VALUES (%s)" % (table, ', '.join(['?'] * len(values))), values)
+                values[0] = None
+                
+                #Deleted record : the next records are intact, so that freeblocks of deleted records are not merged
+                if scenario is not None:
+                    payload_length, header_length = record_lengths(values)
+                    to_delete.append((table, rowid, token, expected_scenario(payload_length, rowid, header_length)))
+                else:
+                    planted.append((table, rowid, token))
+                    truth.append([token, step if step == 'wal' else 'intact', 0, file_name])
+
+            for table, rowid, token, scenario in to_delete:
+                connection.execute("DELETE FROM %s WHERE id = ?" % table, (rowid,))
+                truth.append([token, 'deleted', scenario, file_name])
+        
+        connection.execute("COMMIT")
+
+        #WAL : only the first step is checkpointed into the database
+        if wal and step == 'database':
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    #Copy files before closing the connection (closing checkpoints and deletes the WAL)
+    files = {}
+    for extension in ('', '-journal', '-wal'):
+        if os.path.exists(path + extension):
+            with open(path + extension, 'rb') as database:
+                files[name + extension] = database.read()
+    connection.close()
+    
+    for file_name, content in files.items():
+        with open(os.path.join(os.path.dirname(path), file_name), 'wb') as database:
+            database.write(content)
+    
+    return files
+
+
+
+
+#Function that writes a reproducible corpus : databases, rollback journal, WAL, raw image with these files planted in random bytes, their config.json and the ground truth
+def benchmark_corpus(args):
+    rng = random.Random(args.seed)
+    os.makedirs(args.output, exist_ok=True)
+    
+    tokens = iter(range(10**8))
+    truth, sets = [], []
+
+    #Databases written as files : corpus.db + corpus.db-journal and corpus_wal.db + corpus_wal.db-wal
+    sets.append(build_database(os.path.join(args.output, 'corpus.db'), rng, truth, tokens, args.records, args.deleted))
+    sets.append(build_database(os.path.join(args.output, 'corpus_wal.db'), rng, truth, tokens, args.records, args.deleted, wal=True))
+    
+    #Other databases only planted in the image
+    with tempfile.TemporaryDirectory() as directory:
+        for n in range(args.databases):
+            image_truth = []
+            files = build_database(os.path.join(directory, 'image_%d.db' % n), rng, image_truth, tokens, args.records, args.deleted, wal=(n % 2 == 1))
+            sets.append(files)
+            truth += [[token, kind, scenario, 'image:' + file_name] for token, kind, scenario, file_name in image_truth]
+
+    #Raw image : files planted in random bytes (density : fraction of the image that is SQLite data), until the image size
+    size = int(args.size * 1024 * 1024)
+    planted = set()
+    with open(os.path.join(args.output, 'image.bin'), 'wb') as image:
+        written, n = 0, 0
+        while written < size:
+            for file_name, content in sets[n % len(sets)].items():
+                gap = min(int(len(content) * (1 - args.density) / args.density), size - written)
+                while gap > 0:
+                    chunk = min(gap, 1024 * 1024)
+                    image.write(rng.randbytes(chunk))
+                    written += chunk
+                    gap -= chunk
+                
+                if written + len(content) > size:
+                    break
+                image.write(content)
+                written += len(content)
+                planted.add(file_name)
+            n += 1
+    
+    #Ground truth of the image : every planted file
+    for token, kind, scenario, file_name in list(truth):
+        if file_name.replace('image:', '') in planted:
+            truth.append([token, kind, scenario, 'image.bin'])
+    truth = [entry for entry in truth if not entry[3].startswith('image:')]
+
+    with open(os.path.join(args.output, 'truth.json'), 'w') as truth_file:
+        json.dump(truth, truth_file)
+
+    #config.json of the corpus schema
+    subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.py'), '-i', os.path.join(args.output, 'corpus.db'), '-o', args.output], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    print('%d planted records, image of %.1f MB, written to %s' % (len(truth), written / 1024 / 1024, args.output))
+
+
+
+
+#Function that benchmarks each stage of the carving (find_matches, filter_records, decode_record, insert) on input files,
+#and computes the recall of the planted records of the ground truth
+def benchmark_stages(args):
+    import sqlite_parser
+
+    sqlite_parser.init_worker([args.config], None, prefilter=args.prefilter)
+    schema = sqlite_parser.worker_schemas[args.config]
+
+    with open(args.truth, 'r') as truth_file:
+        truth = json.load(truth_file)
+    
+    stages = ['find_matches', 'filter_records', 'decode_record', 'insert']
+    seconds, items = dict.fromkeys(stages, 0.0), dict.fromkeys(stages, 0)
+    total_size, found = 0, set()
+    counters = {'positions':0, 'candidates':0, 'matches':0, 'valid':0, 'kept':0, 'decoded':0, 'discarded':{}}
+    
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite_parser.open_output_database(os.path.join(directory, 'benchmark.db'), schema['location_create_statements'])
+
+        for input_file in args.input:
+            size = os.path.getsize(input_file)
+            total_size += size
+            found_file = set()
+
+            windows = sqlite_parser.scan_windows(size, int(args.window_size * 1024 * 1024))
+            
+            #Page map of the databases, frames of the WAL files and page records of the journals (their time is part of find_matches)
+            start_time = time.perf_counter()
+            pages_map = sqlite_parser.page_map(sqlite_parser.worker_mmap(input_file)) if args.page_map else None
+            frames_regions = sqlite_parser.wal_regions(sqlite_parser.worker_mmap(input_file))[0] if args.wal else None
+            if args.journal and frames_regions is None:
+                frames_regions = sqlite_parser.journal_regions(sqlite_parser.worker_mmap(input_file), schema['page_size'])[0]
+            seconds['find_matches'] += time.perf_counter() - start_time
+
+            for scenario in range(6):
+                regions = sqlite_parser.scan_regions(size, pages_map, scenario) if pages_map else frames_regions
+                windows_regions = sqlite_parser.window_regions(regions, windows) if regions is not None else [None] * len(windows)
+                for (start, end), regions in zip(windows, windows_regions):
+                    
+                    start_time = time.perf_counter()
+                    matches = sqlite_parser.find_matches(input_file, input_file, args.config, scenario, start, end, counters, regions)
+                    seconds['find_matches'] += time.perf_counter() - start_time
+                    items['find_matches'] += end - start
+                    
+                    start_time = time.perf_counter()
+                    filtered = [sqlite_parser.filter_records(*match) for match in sqlite_parser.matches_arguments(input_file, input_file, args.config, scenario, matches)]
+                    seconds['filter_records'] += time.perf_counter() - start_time
+                    items['filter_records'] += len(filtered)
+                    
+                    start_time = time.perf_counter()
+                    records = [(record[0], record[1] + sqlite_parser.no_location) for record in (sqlite_parser.decode_record(*record) for record in filtered) if record is not None]
+                    seconds['decode_record'] += time.perf_counter() - start_time
+                    items['decode_record'] += len(filtered)
+                    counters['kept'] += len(filtered)
+                    counters['decoded'] += len(records)
+                    
+                    start_time = time.perf_counter()
+                    connection.execute("BEGIN TRANSACTION")
+                    sqlite_parser.insert_records(connection, schema['location_insert_statements'], records)
+                    connection.commit()
+                    seconds['insert'] += time.perf_counter() - start_time
+                    items['insert'] += len(records)
+
+                    #Planted tokens found in the records
+                    for table, values in records:
+                        for value in values[3:]:
+                            if isinstance(value, str):
+                                found_file.update(token_regex.findall(value))
+            
+            found.update((os.path.basename(input_file), token) for token in found_file)
+        
+        connection.close()
+
+    #Throughput of each stage : MB/s of the input files (6 scenarios), and candidates/s (bytes for find_matches, matches for filter_records, records)
+    print('%-22s %10s %12s %16s' % ('stage', 'seconds', 'MB/s', 'candidates/s'))
+    for stage in stages:
+        duration = max(seconds[stage], 1e-9)
+        print('%-22s %10.3f %12.2f %16.0f' % (stage, seconds[stage], 6 * total_size / 1024 / 1024 / duration, items[stage] / duration))
+    
+    #Pass rate of each stage : prefilter, record regex, structural checks of find_matches, decode_record
+    print('\n%-22s %12s %12s %10s' % ('stage', 'in', 'out', 'pass rate'))
+    for stage, before, after in [('prefilter', 'positions', 'candidates'), ('regex', 'candidates', 'matches'), ('structural checks', 'matches', 'valid'), ('decode_record', 'kept', 'decoded')]:
+        print('%-22s %12d %12d %9.4f%%' % (stage, counters[before], counters[after], 100 * counters[after] / max(counters[before], 1)))
+    
+    #Matches discarded by each rule of the structural checks
+    print('\n%-22s %12s' % ('discard rule', 'matches'))
+    for rule, number in sorted(counters['discarded'].items(), key=lambda item: -item[1]):
+        print('%-22s %12d' % (rule, number))
+    
+    #Recall of planted records, per kind (intact, deleted, journal, wal) and expected scenario
+    inputs = set(os.path.basename(input_file) for input_file in args.input)
+    recall = {}
+    for token, kind, scenario, file_name in truth:
+        if file_name in inputs:
+            key = (kind, scenario)
+            recall.setdefault(key, [0, 0])
+            recall[key][1] += 1
+            if (file_name, token) in found:
+                recall[key][0] += 1
+    
+    print('\n%-22s %10s %10s %10s' % ('planted records', 'found', 'planted', 'recall'))
+    for (kind, scenario), (found_number, planted_number) in sorted(recall.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        print('%-22s %10d %10d %9.1f%%' % ('%s (scenario %s)' % (kind, scenario), found_number, planted_number, 100 * found_number / planted_number))
+
+
+
+
+#Command-line arguments
+parser = argparse.ArgumentParser(description='Benchmarks of hiddenLite stages')
+subparsers = parser.add_subparsers(dest='benchmark')
+
+#Insertion of records in the output database
+parser_insert = subparsers.add_parser('insert', help='Rows per second inserted in the output database')
+parser_insert.add_argument('-r', '--rows', type=int, default=200000, help='Number of fake records to insert')
+parser_insert.set_defaults(function=benchmark_insert)
+
+#Decoding of record headers
+parser_header = subparsers.add_parser('header', help='Equivalence check and headers per second decoded by varint.py VS the legacy decoder')
+parser_header.add_argument('-n', '--headers', type=int, default=100000, help='Number of fake headers to decode')
+parser_header.set_defaults(function=benchmark_header)
+
+#Records on window boundaries
+parser_boundary = subparsers.add_parser('boundary', help='Check that records starting near the end of a window are found as with one window for the whole file')
+parser_boundary.add_argument('-r', '--rows', type=int, default=400, help='Number of rows of the test database')
+parser_boundary.add_argument('-s', '--window-sizes', type=float, nargs='+', default=[0.01, 0.003], help='Sizes in MB of the small windows')
+parser_boundary.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+parser_boundary.set_defaults(function=benchmark_boundary)
+
+#Files selected with --linked
+parser_linked = subparsers.add_parser('linked', help='Check that --linked carves the files whose name contains the database name of the config file, and the same records as these files carved with --linked False')
+parser_linked.add_argument('-c', '--config', default=os.path.join('corpus', 'config_corpus.json'), help='config.json of the corpus')
+parser_linked.add_argument('-i', '--input', default='corpus', help='Directory of the corpus')
+parser_linked.set_defaults(function=benchmark_linked)
+
+#Corpus of databases, journal, WAL and raw image with planted records
+parser_corpus = subparsers.add_parser('corpus', help='Write a reproducible corpus with planted records (intact, deleted for scenarios 1-5, journal, WAL) and its ground truth')
+parser_corpus.add_argument('-o', '--output', default='corpus', help='Output directory')
+parser_corpus.add_argument('-s', '--size', type=float, default=64, help='Size in MB of the raw image')
+parser_corpus.add_argument('-d', '--density', type=float, default=0.1, help='Fraction of the raw image that is SQLite data, the rest is random bytes')
+parser_corpus.add_argument('-r', '--records', type=int, default=1000, help='Number of records inserted per transaction in each database')
+parser_corpus.add_argument('-x', '--deleted', type=float, default=0.3, help='Fraction of records deleted (spread over scenarios 1-5)')
+parser_corpus.add_argument('-n', '--databases', type=int, default=8, help='Number of other databases planted (repeatedly) in the raw image')
+parser_corpus.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+parser_corpus.set_defaults(function=benchmark_corpus)
+
+#Throughput of each stage and recall of planted records
+parser_stages = subparsers.add_parser('stages', help='MB/s and candidates/s of each carving stage, and recall of the planted records')
+parser_stages.add_argument('-c', '--config', default=os.path.join('corpus', 'config_corpus.json'), help='config.json of the corpus')
+parser_stages.add_argument('-i', '--input', nargs='+', default=[os.path.join('corpus', name) for name in ('corpus.db', 'corpus.db-journal', 'corpus_wal.db', 'corpus_wal.db-wal', 'image.bin')], help='Files to carve')
+parser_stages.add_argument('-t', '--truth', default=os.path.join('corpus', 'truth.json'), help='Ground truth written with the corpus')
+parser_stages.add_argument('-s', '--window-size', type=float, default=64, help='Size in MB of the windows')
+parser_stages.add_argument('--page-map', action='store_true', help='Search the databases according to their page map (sqlite_parser.py --page-map)')
+parser_stages.add_argument('--wal', action='store_true', help='Search the WAL files frame by frame (sqlite_parser.py --wal)')
+parser_stages.add_argument('--journal', action='store_true', help='Search the rollback journals page record by page record (sqlite_parser.py --journal)')
+parser_stages.add_argument('--no-prefilter', dest='prefilter', action='store_false', help='Search the record regexes at every offset, without their prefilters')
+parser_stages.set_defaults(function=benchmark_stages)
+
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        sys.exit(1)
+
+    args.function(args)
@@ -11,6 +11,7 @@ the database's and schema's information to a config_database.json file.
 import argparse, os, struct, json, mmap, itertools, copy
 from fileinput import filename
 import regex as re
+from varint import decode_header
 from tqdm import tqdm
 from pathlib import Path
 
@@ -40,17 +41,6 @@ list_types = ('INTEGER PRIMARY KEY', 'INTEGER', 'INTEGER NOT NULL', 'BOOLEAN', '
 
 
 
-#Function that decodes Huffman coding
-def huffmanEncoding(x,y):
-    x = int(x)
-    z = (x-128)*128
-    a = z + int(y)
-    
-    return(hex(a))
-
-
-
-
 #Function that translates argument provided by user as True or False
 def true_false(answer):
     #If user gives a boolean argument (True/False)
@@ -68,202 +58,15 @@ def true_false(answer):
 
 
 
-#Function that translates SQLite serial types identifyings used in serial types array into their real value
-def serialTypes(serial_type):
-    _serial_type = 0
-    if serial_type == 5:
-        _serial_type = 6
-    elif serial_type == 6:
-        _serial_type = 8
-    elif serial_type == 7:
-        _serial_type = 8
-    elif serial_type == 8:
-        _serial_type = 0
-    elif serial_type == 9:
-        _serial_type = 0
-    elif serial_type >= 12 and serial_type % 2 == 0:
-        _serial_type = round((serial_type-12)/2)
-    elif serial_type >= 13 and serial_type % 2 != 0:
-        _serial_type = round((serial_type-13)/2)
-    else:
-        _serial_type = serial_type
-
-    return _serial_type
-
-
-
-
 #Function that decodes bytes from potential true header into integers (so that we can do calculations on it afterwards) and appends them to unknown_header list
 def decode_unknown_header(unknown_header, a, b, limit, len_start_header, freeblock=bool):
     
     #a & b are the beginning and the end of the match respectivly
 
-    #Until end of the match
-    count = 0
-    
-    #If the record is overwritten by a freeblock, read 2 bytes (next freeblock offset) then 2 bytes (length of this freeblock)
-    if freeblock:
-        byte = int(struct.unpack('>H', mm.read(2))[0])
-        unknown_header.append(byte)
-        count+=2
-        
-        byte = int(struct.unpack('>H', mm.read(2))[0])
-        unknown_header.append(byte)
-        count+=2
-
-
-    #While not end of the match
-    while count <= (b-a-1):
-        
-        #Before serial types part (start header length): append(byte) to unknown_header
-        if len(unknown_header) < len_start_header:
-
-            #Read byte by byte, convert in integer, and append to unknown_header list
-            byte = int(struct.unpack('>B', mm.read(1))[0])
-            
-            #If byte < 0x80
-            if byte < 128:
-                unknown_header.append(byte)
-                count+=1
-            
-            #Else, handle Huffman encoding until 9 successive bytes
-            else:
-                cont1 = int(struct.unpack('>B', mm.read(1))[0])
-                byte1 = int(huffmanEncoding(byte, cont1),16)
-                if cont1 < 128:
-                    unknown_header.append(byte1)
-                    count+=2
-                else:
-                    cont2 = int(struct.unpack('>B', mm.read(1))[0])
-                    byte2 = int(huffmanEncoding(byte1, cont2),16)
-                    count+=2
-                    if cont2 < 128:
-                        unknown_header.append(byte2)
-                        count+=1
-                    else:
-                        count+=1
-                        cont3 = int(struct.unpack('>B', mm.read(1))[0])
-                        byte3 = int(huffmanEncoding(byte2, cont3),16)
-                        if cont3 < 128:
-                            unknown_header.append(byte3)
-                            count+=1
-                        else:
-                            count+=1
-                            cont4 = int(struct.unpack('>B', mm.read(1))[0])
-                            byte4 = int(huffmanEncoding(byte3, cont4),16)
-                            if cont4 < 128:
-                                unknown_header.append(byte4)
-                                count+=1
-                            else:
-                                count+=1
-                                cont5 = int(struct.unpack('>B', mm.read(1))[0])
-                                byte5 = int(huffmanEncoding(byte4, cont5),16)
-                                if cont5 < 128:
-                                    unknown_header.append(byte5)
-                                    count+=1
-                                else:
-                                    count+=1
-                                    cont6 = int(struct.unpack('>B', mm.read(1))[0])
-                                    byte6 = int(huffmanEncoding(byte5, cont6),16)
-                                    if cont6 < 128:
-                                        unknown_header.append(byte6)
-                                        count+=1
-                                    else:
-                                        count+=1
-                                        cont7 = int(struct.unpack('>B', mm.read(1))[0])
-                                        byte7 = int(huffmanEncoding(byte6, cont7),16)
-                                        if cont7 < 128:
-                                            unknown_header.append(byte7)
-                                            count+=1
-                                        else:
-                                            count+=1
-                                            cont8 = int(struct.unpack('>B', mm.read(1))[0])
-                                            byte8 = int(huffmanEncoding(byte7, cont8),16)
-                                            if cont8 < 128:
-                                                unknown_header.append(byte8)
-                                                count+=1
-                                            else:
-                                                count+=1
-                                                byte9 = int(huffmanEncoding(byte7, cont8),16)
-                                                unknown_header.append(byte9)
-        
-        
-        #Serial types part : append(serialTypes(byte)) to unknown_header
-        else:
-            
-            #Append limit to list of limits to know how many bytes takes the start of the header (because 3 integers are not necessarily only 3 bytes)
-            limit.append(count)
-            
-            #Read byte by byte, convert in integer, and append to unknown_header list
-            byte = int(struct.unpack('>B', mm.read(1))[0])
-            
-            #If byte < 0x80
-            if byte < 128:
-                unknown_header.append(serialTypes(byte))
-                count+=1
-            
-            #Else, handle Huffman encoding until 9 successive bytes
-            else:
-                cont1 = int(struct.unpack('>B', mm.read(1))[0])
-                byte1 = int(huffmanEncoding(byte, cont1),16)
-                if cont1 < 128:
-                    unknown_header.append(serialTypes(byte1))
-                    count+=2
-                else:
-                    cont2 = int(struct.unpack('>B', mm.read(1))[0])
-                    byte2 = int(huffmanEncoding(byte1, cont2),16)
-                    count+=2
-                    if cont2 < 128:
-                        unknown_header.append(serialTypes(byte2))
-                        count+=1
-                    else:
-                        count+=1
-                        cont3 = int(struct.unpack('>B', mm.read(1))[0])
-                        byte3 = int(huffmanEncoding(byte2, cont3),16)
-                        if cont3 < 128:
-                            unknown_header.append(serialTypes(byte3))
-                            count+=1
-                        else:
-                            count+=1
-                            cont4 = int(struct.unpack('>B', mm.read(1))[0])
-                            byte4 = int(huffmanEncoding(byte3, cont4),16)
-                            if cont4 < 128:
-                                unknown_header.append(serialTypes(byte4))
-                                count+=1
-                            else:
-                                count+=1
-                                cont5 = int(struct.unpack('>B', mm.read(1))[0])
-                                byte5 = int(huffmanEncoding(byte4, cont5),16)
-                                if cont5 < 128:
-                                    unknown_header.append(serialTypes(byte5))
-                                    count+=1
-                                else:
-                                    count+=1
-                                    cont6 = int(struct.unpack('>B', mm.read(1))[0])
-                                    byte6 = int(huffmanEncoding(byte5, cont6),16)
-                                    if cont6 < 128:
-                                        unknown_header.append(serialTypes(byte6))
-                                        count+=1
-                                    else:
-                                        count+=1
-                                        cont7 = int(struct.unpack('>B', mm.read(1))[0])
-                                        byte7 = int(huffmanEncoding(byte6, cont7),16)
-                                        if cont7 < 128:
-                                            unknown_header.append(serialTypes(byte7))
-                                            count+=1
-                                        else:
-                                            count+=1
-                                            cont8 = int(struct.unpack('>B', mm.read(1))[0])
-                                            byte8 = int(huffmanEncoding(byte7, cont8),16)
-                                            if cont8 < 128:
-                                                unknown_header.append(serialTypes(byte8))
-                                                count+=1
-                                            else:
-                                                count+=1
-                                                byte9 = int(huffmanEncoding(byte7, cont8),16)
-                                                unknown_header.append(serialTypes(byte9))
-
-    return unknown_header, limit
+    #Decode the whole header of the match (start of the header, then serial types) in one call
+    header, header_2, header_limit = decode_header(mm, a, b, len_start_header, freeblock)
+    unknown_header.extend(header)
+    limit.extend(header_limit)
 
 
 
@@ -11,11 +11,12 @@ as the one retrieved by config.py.
 
 
 
-import argparse, sys, os, struct, json, mmap, sqlite3, tqdm, copy, time, multiprocessing
+import argparse, sys, os, struct, json, csv, mmap, sqlite3, tqdm, copy, time, math, pickle, queue, threading, multiprocessing, hashlib, bisect, heapq, zlib
 import regex as re
-from ast import literal_eval
-from itertools import chain
+import varint
 from multiprocessing import cpu_count
+from collections import OrderedDict, deque
+from array import array
 
 
 
@@ -23,6 +24,109 @@ from multiprocessing import cpu_count
 #Compute time elapsed after each scenario processing
 start_time = time.time()
 
+#Schemas (compiled regexes) of all config files, loaded once by each worker process of the pool (init_worker)
+worker_schemas = {}
+
+#Hash of this file, version of the cached schemas (tool_version)
+source_hash = None
+
+#Number of records inserted in output database between two commits
+records_batch_size = 10000
+
+#Deduplication of the records written (--dedup) : size in bytes of the bloom filter of the hashes of the records, number of hashes of the last unique records kept in memory with their table and id
+#Hashes let through by the bloom filter and not in memory are looked up in the provenance table of the output database
+dedup_bloom_size = 16 * 1024 * 1024
+dedup_recent_size = 100000
+provenance_table = 'carved_records_provenance'
+
+#Cache of the records carved from each file (--results-cache) : files up to results_full_hash_size are hashed entirely, larger files by results_hash_blocks blocks of results_hash_block_size
+#(with their size and modification time), the least recently used results are removed above results_cache_size bytes
+results_full_hash_size = 16 * 1024 * 1024
+results_hash_blocks = 64
+results_hash_block_size = 64 * 1024
+results_cache_size = 4 * 1024 * 1024 * 1024
+
+#Checkpoints of the windows carved (file, scenario, window), written with their records with --resume only : --resume skips them. Records and checkpoints waiting are committed at least every checkpoint_interval seconds
+checkpoints_table = 'carved_checkpoints'
+checkpoint_interval = 10
+
+#Prefilter of the record regexes (build_prefilter) : maximum number of bytes classes, maximum expected pass rate on random bytes,
+#maximum fraction of a window let through (prefilter_candidates, else the whole window is searched), expected fraction of zero-filled bytes in files, size of the chunks scanned at once
+prefilter_conditions = 4
+prefilter_max_pass_rate = 0.02
+prefilter_max_candidates = 0.03
+prefilter_zero_fraction = 0.5
+prefilter_chunk_size = 1024 * 1024
+
+#Profiles of the regexes of the parts of record headers already computed (piece_profile)
+pieces_profiles = {}
+
+#Search records regexes only at the offsets let through by the prefilters (--prefilter), set by init_worker
+worker_prefilter = True
+
+#Start of the header (number of values before the serial types) and freeblock of the records of each scenario 0-5, to decode the header of their matches
+scenarios_headers = ((3, False), (2, True), (2, True), (3, True), (3, True), (4, True))
+
+#Description of the records of each scenario 0-5, and index of the first serial type of their decoded header (z)
+scenarios_infos = (('Scenario 0 : non-deleted or non-overwritten (journal files) records', 3), ('Scenario 1 : deleted records overwritten until type 2', 2), ('Scenario 2 : deleted records overwritten until type 1', 2), 
+                   ('Scenario 3 : deleted records overwritten until serial types array length', 3), ('Scenario 4 : deleted records overwritten until part of serial types array length', 3), ('Scenario 5 : deleted records overwritten until part of rowid', 4))
+
+#Number of files of the --input directories discovered ahead of the files being carved, among which the largest are carved first (ingest_files)
+ingest_lookahead = 4096
+
+#Inventory of the input files (--inventory) : signatures of SQLite databases, WAL files and rollback journals, number and size of the blocks sampled over each file (sniff_file, smaller files are read entirely), 
+#compression ratio (zlib) from which a block is random, compressed or encrypted data, kinds of the files (and kinds of the files carved after the others, which may still contain records) and table of the index of the inventory in the cache directory
+sqlite_magic = b'SQLite format 3\x00'
+wal_magics = (b'\x37\x7f\x06\x82', b'\x37\x7f\x06\x83')
+journal_magic = b'\xd9\xd5\x05\xf9\x20\xa1\x63\xd7'
+inventory_samples = 32
+inventory_block_size = 4096
+inventory_entropy_ratio = 0.98
+inventory_kinds = ['sqlite', 'wal', 'journal', 'zero-filled', 'high entropy', 'other']
+inventory_deferred = ('zero-filled', 'high entropy')
+inventory_table = 'inventory'
+inventory_commit_size = 1000
+
+#Number of matches of a table decoded and filtered together by carve_window, so that only the survivors of a chunk are kept
+match_chunk_size = 4096
+
+#Location columns added after the values of each record : page number of a WAL frame or of a journal page record, WAL frame number and its commit status (see wal_regions and journal_regions)
+location_fields = ['carved_record_page', 'carved_record_frame', 'carved_record_commit']
+no_location = (None, None, None)
+
+#Kinds of the pages of a database (page_map) and page kind of each b-tree page type byte
+page_kinds = ['unparseable', 'table leaf', 'table interior', 'index leaf', 'index interior', 'overflow', 'freelist trunk', 'freelist leaf']
+btree_kinds = {13:1, 5:2, 10:3, 2:4}
+
+#Access to the files carved by a worker (--access) : mmap, read or auto (chosen for each file by file_access), set by init_worker
+worker_access = 'mmap'
+
+#Window read by a worker with access read (load_window) : path, offset of the buffer in the file, buffer, buffer until the end of the file, open file ; and buffer reused for each window
+worker_window = None
+worker_buffer = bytearray()
+
+#Bytes read after the end of a window with access read, for the regexes, prefilters and payloads of the records starting at its end (bytes after it are read on their own), and size of each read
+read_overlap = 1024 * 1024
+read_block_size = 8 * 1024 * 1024
+
+#With access auto, files smaller than read_small_size or on a network or FUSE file system (page faults of a mmap are slow there) are read instead of mapped
+read_small_size = 1024 * 1024
+read_file_systems = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', 'afs', '9p', 'ceph', 'glusterfs', 'lustre', 'gpfs', 'davfs', 'sshfs', 'fuse', 'fuseblk', 'virtiofs')
+
+#File system of each mount point (file_system_type), read once per process
+mount_points = None
+
+#Memory maps of the files being processed by a worker (worker_mmap), most recently used last
+worker_files = OrderedDict()
+max_worker_files = 16
+
+#Keywords (--keyword, --keywords-file) : number of first bytes of the keywords checked for a whole chunk at once (find_keywords), keywords searcher set by init_worker
+#and offsets of the keywords already found by the worker in the windows of the files, per (file, window start), most recently used last (keyword_hits)
+keyword_gram = 4
+worker_keywords = None
+worker_hits = OrderedDict()
+
+
 
 
 
@@ -97,17 +201,6 @@ fixed_bytes = ('zero', 'boolean', 'boolean_not_null', 'integer', 'integer_not_nu
 
 
 
-#Function that decodes Huffman coding
-def huffmanEncoding(x,y):
-    x = int(x)
-    z = (x-128)*128
-    a = z + int(y)
-    
-    return(hex(a))
-
-
-
-
 #Function that translates argument provided by user as True or False
 def true_false(answer):
     #If user gives a boolean argument (True/False)
@@ -125,37 +218,183 @@ def true_false(answer):
 
 
 
-#Function that translates SQLite serial types identifyings used in serial types array into their real value
-def serialTypes(serial_type):
-    _serial_type = 0
-    if serial_type == 5:
-        _serial_type = 6
-    elif serial_type == 6:
-        _serial_type = 8
-    elif serial_type == 7:
-        _serial_type = 8
-    elif serial_type == 8:
-        _serial_type = 0
-    elif serial_type == 9:
-        _serial_type = 0
-    elif serial_type >= 12 and serial_type % 2 == 0:
-        _serial_type = round((serial_type-12)/2)
-    elif serial_type >= 13 and serial_type % 2 != 0:
-        _serial_type = round((serial_type-13)/2)
+#Function that replaces types with their specific regex for each table, retrieved from config.json (e.g. 'INTEGER PRIMARY KEY' (necessarily a 0) --> 'zero' --> r'[\x00]{1}')
+def regex_types(fields_types_):
+    for key,value in types_sub.items():
+        fields_types_ = re.sub(rf'.*{key}.*', value, fields_types_, flags=re.IGNORECASE)
+    
+    return fields_types_
+
+
+
+
+#Function that returns the profile of the regex of a part of a record header (e.g. rowid, freeblock length, a column type) :
+#classes of the bytes at fixed offsets at its start (all its bytes if it has a fixed length, else its first byte), and its minimum and maximum length
+def piece_profile(piece):
+    if piece in pieces_profiles:
+        return pieces_profiles[piece]
+
+    pattern = re.compile(piece.encode('UTF8'))
+    
+    #Possible first bytes, parts of 1 byte, parts of 2 bytes and parts that can be longer (varints up to 9 bytes)
+    first = [byte for byte in range(256) if pattern.fullmatch(bytes([byte]), partial=True)]
+    ones = [byte for byte in first if pattern.fullmatch(bytes([byte]))]
+    twos, longer = [], False
+    for byte in reversed(first):
+        for next_byte in reversed(range(256)):
+            match = pattern.fullmatch(bytes([byte, next_byte]), partial=True)
+            if match and match.partial:
+                longer = True
+                break
+            elif match:
+                twos.append((byte, next_byte))
+        if longer:
+            break
+
+    #Part that can be empty : no byte at a fixed offset
+    if pattern.fullmatch(b''):
+        profile = ([set(range(256))], 0, 9)
+    elif longer:
+        profile = ([set(first)], 1 if ones else 2, 9)
+    elif twos and not ones:
+        profile = ([set(byte for byte, next_byte in twos), set(next_byte for byte, next_byte in twos)], 2, 2)
+    elif twos:
+        profile = ([set(first)], 1, 2)
     else:
-        _serial_type = serial_type
+        profile = ([set(ones)], 1, 1)
 
-    return _serial_type
+    pieces_profiles[piece] = profile
+    return profile
 
 
 
 
-#Function that replaces types with their specific regex for each table, retrieved from config.json (e.g. 'INTEGER PRIMARY KEY' (necessarily a 0) --> 'zero' --> r'[\x00]{1}')
-def regex_types(fields_types_):
-    for key,value in types_sub.items():
-        fields_types_ = re.sub(rf'.*{key}.*', value, fields_types_, flags=re.IGNORECASE)
+#Function that builds the prefilter of a table from the regexes of the parts of its record header : bytes classes at fixed offsets from an anchor,
+#and minimum and maximum number of bytes between the start of a record and the anchor
+#lookahead (index of the first type in pieces, regex of a byte class, n) : the n types can't all be in the class (negative lookahead assertion of the record regex)
+#The anchor is the part of the header (e.g. serial types array length, freeblock length) after which the bytes classes let the fewest positions through,
+#files being modeled as zero-filled regions (prefilter_zero_fraction) and random bytes
+#Returns None if no anchor lets less than prefilter_max_pass_rate positions through : the record regex is then searched at every position
+def build_prefilter(pieces, lookahead=None):
+    profiles = [piece_profile(piece) for piece in pieces]
+    best = None
     
-    return fields_types_
+    #Bytes before the anchor
+    before_min, before_max = 0, 0
+    
+    for anchor in range(len(profiles)):
+        conditions, offset = [], 0
+        
+        #Bytes classes at fixed offsets from the anchor, until a part of variable length or enough conditions
+        for classes, minimum, maximum in profiles[anchor:]:
+            for n, byte_class in enumerate(classes):
+                if len(byte_class) < 256:
+                    conditions.append((offset + n, byte_class))
+            if minimum != maximum or len(conditions) >= prefilter_conditions:
+                break
+            offset += minimum
+        conditions = conditions[:prefilter_conditions]
+
+        #Offset of the negative lookahead assertion from the anchor, if the parts between them have a fixed length
+        run = None
+        if lookahead:
+            index, byte_class, n = lookahead
+            between = profiles[anchor:index] if index >= anchor else profiles[index:anchor]
+            if all(minimum == maximum for classes, minimum, maximum in between):
+                run_offset = sum(minimum for classes, minimum, maximum in between)
+                run = (run_offset if index >= anchor else -run_offset, byte_class, n)
+        
+        #Expected fraction of positions let through : zero-filled regions pass if every class contains \x00 and there is no negative lookahead, random bytes pass with the product of the classes' sizes
+        zero_pass = 0 if run or any(0 not in byte_class for offset, byte_class in conditions) else 1
+        random_pass = 1
+        for offset, byte_class in conditions:
+            random_pass *= len(byte_class) / 256
+        pass_rate = (before_max - before_min + 1) * (prefilter_zero_fraction * zero_pass + (1 - prefilter_zero_fraction) * random_pass)
+        
+        if conditions and (best is None or pass_rate < best[0]):
+            best = (pass_rate, conditions, run, before_min, before_max)
+        
+        before_min += profiles[anchor][1]
+        before_max += profiles[anchor][2]
+
+    if best is None or best[0] > prefilter_max_pass_rate:
+        return None
+    
+    #Translation tables : byte --> 1 if it's in the class, else 0
+    pass_rate, conditions, run, before_min, before_max = best
+    conditions = [(offset, bytes([1 if byte in byte_class else 0 for byte in range(256)])) for offset, byte_class in conditions]
+    if run:
+        run_offset, byte_class, n = run
+        byte_class = re.compile(byte_class.encode('UTF8'))
+        run = (run_offset, bytes([1 if byte_class.fullmatch(bytes([byte])) else 0 for byte in range(256)]), n)
+
+    return (conditions, run, before_min, before_max)
+
+
+
+
+#Function that returns the sorted offsets of the window [start, end) at which a record regex can match, according to the prefilter of the table
+#Each condition translates the bytes of the file into 0/1 (C speed), read as a big integer : AND of the integers shifted by the offsets = anchors
+#Anchors followed (at the offset of the negative lookahead assertion) by a run of at least n bytes of its class are removed
+#Returns None if more than prefilter_max_candidates of the window are candidates : trying the regex at each candidate would then be slower than searching the whole window
+def prefilter_candidates(mm, start, end, prefilter):
+    conditions, run, before_min, before_max = prefilter
+    width = max(offset for offset, table in conditions) + 1
+    span = before_max - before_min + 1
+    max_candidates = prefilter_max_candidates * (end - start)
+    anchors = []
+
+    #Anchors of the records starting in the window, by chunks
+    first, last = start + before_min, min(end + before_max, len(mm))
+    for chunk_start in range(first, last, prefilter_chunk_size):
+        chunk_end = min(chunk_start + prefilter_chunk_size, last)
+        size = chunk_end - chunk_start
+        data = mm[chunk_start:chunk_end + width]
+        
+        mask = -1
+        for offset, table in conditions:
+            mask &= int.from_bytes(data[offset:offset + size].translate(table), 'little')
+            if not mask:
+                break
+        if not mask:
+            continue
+
+        #Runs of at least n bytes of the class of the negative lookahead assertion (e.g. zero-filled regions)
+        if run:
+            run_offset, table, n = run
+            run_start = max(chunk_start + run_offset, 0)
+            in_class = mm[run_start:min(chunk_end + run_offset + n - 1, len(mm))].translate(table)
+            allowed = bytearray(b'\x01') * size
+            position = in_class.find(b'\x01' * n)
+            while position != -1:
+                position_end = in_class.find(b'\x00', position + n)
+                if position_end == -1:
+                    position_end = len(in_class)
+                low, high = max(run_start + position - run_offset - chunk_start, 0), run_start + position_end - n + 1 - run_offset - chunk_start
+                allowed[low:high] = bytes(high - low)
+                position = in_class.find(b'\x01' * n, position_end)
+            mask &= int.from_bytes(allowed, 'little')
+            if not mask:
+                continue
+        
+        hits = mask.to_bytes(size, 'little')
+        if (len(anchors) + hits.count(1)) * span > max_candidates:
+            return None
+
+        position = hits.find(1)
+        while position != -1:
+            anchors.append(chunk_start + position)
+            position = hits.find(1, position + 1)
+
+    #Start of the records of each anchor
+    if span == 1:
+        return [anchor - before_min for anchor in anchors if start <= anchor - before_min < end]
+
+    candidates = set()
+    for anchor in anchors:
+        candidates.update(range(max(anchor - before_max, start), min(anchor - before_min, end - 1) + 1))
+
+    return sorted(candidates)
 
 
 
@@ -165,6 +404,9 @@ def build_regex(fields_numbers, fields_types, fields_names, tables_names, header
     
     #Header pattern copy to know each column type aften construction of regex
     headers_patterns_copy = []
+
+    #Prefilter of each table (build_prefilter)
+    prefilters = []
     
     #Until number of columns per table
     j=0
@@ -480,6 +722,8 @@ def build_regex(fields_numbers, fields_types, fields_names, tables_names, header
     
 
     #Build a start of header according to each scenario and add it to a list of start headers
+    #The regexes of each part of the start header are also kept to build the prefilter of the table (build_prefilter)
+    starts_pieces = []
     #If the record is overwritten by a freeblock
     if freeblock:
         #Freeblock overwrites record until the rowid, so we recover from the serial types array length
@@ -487,53 +731,44 @@ def build_regex(fields_numbers, fields_types, fields_names, tables_names, header
             for index in range(len(freeblock_min_max)):
                 start_header = "".join(['((', next_freeblock, freeblock_min_max[index], array_min_max[index], ')'])
                 starts_headers.append(start_header)
+                starts_pieces.append([next_freeblock, freeblock_min_max[index], array_min_max[index]])
         #Freeblock overwrites record until part of the serial types array length, so we recover part of it
         elif scenario == 4:
             for index in range(len(freeblock_min_max)):
                 start_header = "".join(['((', next_freeblock, freeblock_min_max[index], array_min_max[index], ')'])
                 starts_headers.append(start_header)
+                starts_pieces.append([next_freeblock, freeblock_min_max[index], array_min_max[index]])
         #Freeblock overwrites record until part of the rowid, so we recover part of it
         elif scenario == 5:
             for index in range(len(freeblock_min_max)):
                 start_header = "".join(['((', next_freeblock, freeblock_min_max[index], row_id, array_min_max[index], ')'])
                 starts_headers.append(start_header)
+                starts_pieces.append([next_freeblock, freeblock_min_max[index], row_id, array_min_max[index]])
         #Freeblock overwrites record until type1 or until array length, so we recover from type2 or type1
         elif scenario == 1 or scenario == 2:
             for index in range(len(freeblock_min_max)):
                 start_header = "".join(['((', next_freeblock, freeblock_min_max[index], ')'])
                 starts_headers.append(start_header)
+                starts_pieces.append([next_freeblock, freeblock_min_max[index]])
     
     #If the record is not overwritten by a freeblock (intact)
     else:
         for index in range(len(payload_min_max)):
             start_header = "".join(['((', payload_min_max[index], row_id, array_min_max[index], ')'])
             starts_headers.append(start_header)
+            starts_pieces.append([payload_min_max[index], row_id, array_min_max[index]])
 
     
 
     #Concerning record payload (content)
+    #Keywords (--keyword) are not part of the regex : the payload is validated by its types, then keywords are searched in the payload (see keyword_hits)
     for payload_pattern in payloads_patterns:
         
-        #Optionnal command --keyword : if we want to search for records that contain a certain word (keyword searching)
-        #If the user gives a keyword
-        if args.keyword:
-            #Transform this keyword in hexadecimal format \x..\x..
-            hex_str = args.keyword.encode('utf-8')
-            hex_str = hex_str.hex()
-            hex_str = '\\x'.join(a+b for a,b in zip(hex_str[::2], hex_str[1::2]))
-            hex_str = "".join(['\\x', str(hex_str)])
-            hex_str = literal_eval(("'%s'"%hex_str))
-            #Clear the existing payload pattern and replace it by the keyword
-            payload_pattern.clear()
-            payload_pattern.append(rf'.*{hex_str}')
-        
-        #If the user does not give a keyword
-        else:
-            #Replace each type identifying by a regex
-            for n,i in enumerate(payload_pattern):
-                for k,v in dict_payload.items():
-                    if i == k:
-                        payload_pattern[n] = v
+        #Replace each type identifying by a regex
+        for n,i in enumerate(payload_pattern):
+            for k,v in dict_payload.items():
+                if i == k:
+                    payload_pattern[n] = v
         
         #Surround record payload pattern group by (?=( and )), ?= being for the lookahead assertion regex search
         #We just want to keep the record header, so we match the record payload implicitly by a lookahead assertion
@@ -568,18 +803,27 @@ def build_regex(fields_numbers, fields_types, fields_names, tables_names, header
         #Concatenate all regexes of a given table
         #E.g. [[\x00]{1}, [\x00-\x09]{1}, [\x00-\x09]{1}] --> [[\x00]{1}[\x00-\x09]{1}[\x00-\x09]{1}]
         regex_construct = ''.join(header_pattern)
-        #Transform the whole regex in bytes b'' so that we can search regex in file afterwards
+        #Transform the whole regex in bytes b'' so that we can search regex in file afterwards (compiled by load_schema)
         regex_construct = regex_construct.encode('UTF8')
-        #Compile regex to be usable
-        regex_construct = re.compile(regex_construct)
         #Append to list of regexes
         regex_constructs.append(regex_construct)
 
+        #Prefilter : regexes of the start of header and of the column types, in the order they appear in the record header (type1 is overwritten in scenario 1)
+        pieces = starts_pieces[index] + [dict_types[i] for i in headers_patterns_copy[index][(1 if scenario == 1 else 0):]]
+        if scenario == 1:
+            pieces = [piece.replace('1,8', '0') for piece in pieces]
+        if scenario == 2 or scenario == 3 or scenario == 4 or scenario == 5:
+            pieces = [piece.replace('1,8', '1') for piece in pieces]
+        #Same bytes as the negative lookahead assertion before the types
+        types_start = len(starts_pieces[index])
+        lookahead = (types_start, r'[\x00]' if scenario == 0 else r'[\x00|\x0c|\x0d|\x08|\x09]', len(pieces) - types_start)
+        prefilters.append(build_prefilter(pieces, lookahead))
+
 
     #Link together in a dict the table name, columns names, types identifyings and the whole regex for that table
     for i in range(len(regex_constructs)):
         
-        table_regex = {tables_names[i]:[lists_fields[i], headers_patterns_copy[i], regex_constructs[i]]}
+        table_regex = {tables_names[i]:[lists_fields[i], headers_patterns_copy[i], regex_constructs[i], prefilters[i]]}
         
         #Add some information columns before the real table columns to specify the file from which the record is carved, its offset on the file and the scenario
         for table, fields_regex in table_regex.items():
@@ -596,882 +840,2231 @@ def build_regex(fields_numbers, fields_types, fields_names, tables_names, header
 
 
 
-#Function that iterates regexes over file, finds matches and adds them to matches list
-def find_matches(mainfile, open_file, table, fields_regex, scenario):
-    
-    #Variables to pass to decode_unknown_header function
-    unknown_header, unknown_header_2, limit, matches = [], [], [], []
-    if scenario == 0:
-        len_start_header = 3
-        freeblock = False
-    elif scenario == 1 or scenario == 2:
-        len_start_header = 2
-        freeblock = True
-    elif scenario == 3 or scenario == 4:
-        len_start_header = 3
-        freeblock = True
-    elif scenario == 5:
-        len_start_header = 4
-        freeblock = True
-
-    #Open mainfile in binary format and reading mode
-    with open(open_file, 'r+b') as file:
-        
-        #Iterate over the file (mm)    
-        #mmap: file is mapped in memory and its content is internally loaded from disk as needed
-        #instead of file.read() or file.readlines(), improves performance speading up the reading of files
-        mm = mmap.mmap(file.fileno(), length=0, access=mmap.ACCESS_READ)
-            
-        #Search and process each match
-        #Update regex module : since regex 2021.4.4 : overlapped=True finds overlapping matches (match starting at an offset inside another match)
-        for match in re.finditer(fields_regex[2], mm, overlapped=True, concurrent=True):
-            
-            #Start and end of match
-            a = match.start()
-            b = match.end()
-            
-            #Append match and related variables to list of matches
-            matches.append((a, b, mainfile, open_file, table, fields_regex, unknown_header, unknown_header_2, limit, scenario, len_start_header, freeblock))
-        
-        #Free the memory
-        mm.close()
-    
-    #Close mainfile
-    file.close()
+#Function that generates the schema of a config.json file : output database name, CREATE statements and regexes (not compiled) of every table for each scenario
+def generate_schema(configfile):
+
+    #List of CREATE statements to create output database, without and with the location columns
+    create_statements, location_create_statements = [], []
+    page_size = None
+
+    #Open each config.json file provided containing db infos, each table, column and type of column
+    with open(configfile, 'r') as config_file:
+        #Load content
+        data = json.load(config_file)
+
+        #Close file
+        config_file.close()
+
+    #Db general information is in data[0], all tables and columns/types are in data[1:]
+    for key,value in data[0].items():
+        #Name the output database by retrieving the main database name in config.json db infos
+        if key == "file name":
+            output_db = "".join(['output_', value, '.db'])
+        #Page size of the database, to find the page records of journal files whose header is zeroed (--journal)
+        if key == "page size":
+            page_size = int(value.split()[0])
+        #Quit script if encoding other than utf-8
+        if key == "text encoding" and value != 'UTF-8':
+            sys.exit("Database encoding is not utf-8!")
+
+    #Retrieve the database schema from data[1:]
+    for element in data[1:]:
+        #To create an output database based on this schema and insert information columns before the real columns 
+        for key,value in element.items():
+            statement = json.dumps(value)
+            statement = statement.replace('}', ')')
+            statement = statement.replace('"', '')
+            statement = statement.replace(':', '')
+            #Replace all INTEGER PRIMARY KEY by INTEGER because they might not be unique : the output database has carved_record_id column as INTEGER PRIMARY KEY autoincrement
+            statement = statement.replace('INTEGER PRIMARY KEY', 'INTEGER')
+            #Location columns (page, frame and commit status) are only in the tables created with --wal or --journal
+            location_statement = statement.replace('{', '(carved_record_id INTEGER PRIMARY KEY AUTOINCREMENT, carving_scenario_number TEXT, carved_record_offset INTEGER, carved_record_file TEXT, carved_record_page INTEGER, carved_record_frame INTEGER, carved_record_commit TEXT, ')
+            statement = statement.replace('{', '(carved_record_id INTEGER PRIMARY KEY AUTOINCREMENT, carving_scenario_number TEXT, carved_record_offset INTEGER, carved_record_file TEXT, ')
+            #Create tables with statements constructed
+            create_statement = "".join(['CREATE TABLE ', key, ' ', statement])
+            create_statements.append(create_statement)
+            location_create_statements.append("".join(['CREATE TABLE ', key, ' ', location_statement]))
+
+
+
+    #Retrieve information about tables and columns
+
+    #List of number of columns per table, of types per field, of tables' names & of fields' names
+    fields_numbers, fields_types, tables_names, fields_names = [], [], [], []
+
+    #For each table:
+    for element in data[1:]:
+        #For table_name, fields
+        for key, value in element.items():
+            #Append all the table's names to tables_names list
+            tables_names.append(key)
+            #Number of columns per table
+            fields_number = len(value)
+            #Append number of columns per table to fields_numbers list
+            fields_numbers.append(fields_number)
+            #List of types per table : column name and type
+            for key1, value1 in value.items():
+                field_name = key1
+                field_type = value1
+                #Append column name and type to fields_names and fields_types
+                fields_names.append(field_name)
+                fields_types.append(field_type)
+
+
+    """Build regexes for each scenario (intact records VS overwritten records according to each scenario)"""
+
+    #Scenario 0
+    header_pattern, headers_patterns, payloads_patterns, regex_constructs, tables_regexes, list_fields, lists_fields, starts_headers = [], [], [], [], [], [], [], []
+    build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern, headers_patterns, payloads_patterns, list_fields, lists_fields, regex_constructs, tables_regexes, starts_headers, scenario=0, freeblock=False)
+
+    #Scenario 1
+    header_pattern_s1, headers_patterns_s1, payloads_patterns_s1, regex_constructs_s1, tables_regexes_s1, list_fields_s1, lists_fields_s1, starts_headers_s1 = [], [], [], [], [], [], [], []
+    build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s1, headers_patterns_s1, payloads_patterns_s1, list_fields_s1, lists_fields_s1, regex_constructs_s1, tables_regexes_s1, starts_headers_s1, scenario=1, freeblock=True)
+
+    #Scenario 2
+    header_pattern_s2, headers_patterns_s2, payloads_patterns_s2, regex_constructs_s2, tables_regexes_s2, list_fields_s2, lists_fields_s2, starts_headers_s2 = [], [], [], [], [], [], [], []
+    build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s2, headers_patterns_s2, payloads_patterns_s2, list_fields_s2, lists_fields_s2, regex_constructs_s2, tables_regexes_s2, starts_headers_s2, scenario=2, freeblock=True)
+
+    #Scenario 3
+    header_pattern_s3, headers_patterns_s3, payloads_patterns_s3, regex_constructs_s3, tables_regexes_s3, list_fields_s3, lists_fields_s3, starts_headers_s3 = [], [], [], [], [], [], [], []
+    build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s3, headers_patterns_s3, payloads_patterns_s3, list_fields_s3, lists_fields_s3, regex_constructs_s3, tables_regexes_s3, starts_headers_s3, scenario=3, freeblock=True)
+
+    #Scenario 4
+    header_pattern_s4, headers_patterns_s4, payloads_patterns_s4, regex_constructs_s4, tables_regexes_s4, list_fields_s4, lists_fields_s4, starts_headers_s4 = [], [], [], [], [], [], [], []
+    build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s4, headers_patterns_s4, payloads_patterns_s4, list_fields_s4, lists_fields_s4, regex_constructs_s4, tables_regexes_s4, starts_headers_s4, scenario=4, freeblock=True)
+
+    #Scenario 5
+    header_pattern_s5, headers_patterns_s5, payloads_patterns_s5, regex_constructs_s5, tables_regexes_s5, list_fields_s5, lists_fields_s5, starts_headers_s5 = [], [], [], [], [], [], [], []
+    build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s5, headers_patterns_s5, payloads_patterns_s5, list_fields_s5, lists_fields_s5, regex_constructs_s5, tables_regexes_s5, starts_headers_s5, scenario=5, freeblock=True)
+
+
+    #Regexes of every table, per scenario number
+    all_tables_regexes = [tables_regexes, tables_regexes_s1, tables_regexes_s2, tables_regexes_s3, tables_regexes_s4, tables_regexes_s5]
+
+    #Prepared INSERT statement of each table, with information columns and table columns, without and with location columns (same for every scenario)
+    insert_statements, location_insert_statements = {}, {}
+    for table_regex in tables_regexes:
+        for table, fields_regex in table_regex.items():
+            for statements, table_fields in ((insert_statements, fields_regex[0]), (location_insert_statements, fields_regex[0] + location_fields)):
+                #For columns' special names escaped with [], brackets are replaced by double quotes
+                fields = ", ".join(['"' + field.replace('[', '').replace(']', '').replace('"', '""') + '"' for field in table_fields])
+                parameters = ", ".join(['?'] * len(table_fields))
+                statements[table] = "".join(["INSERT INTO", " ", table, " (", fields, ") VALUES (", parameters, ")"])
 
-    #Return list of matches and related variables
-    return [matches]
+    return {'output_db':output_db, 'create_statements':create_statements, 'insert_statements':insert_statements, 'location_create_statements':location_create_statements, 'location_insert_statements':location_insert_statements, 
+            'tables_regexes':all_tables_regexes, 'page_size':page_size}
 
 
 
 
-#Function that decodes bytes from potential true header into integers (so that we can do calculations on it afterwards) and appends them to unknown_header list
-def decode_unknown_header(a, b, mainfile, open_file, table, fields_regex, unknown_header, unknown_header_2, limit, scenario, len_start_header, freeblock):
+#Function that returns the version of the tool, i.e. the hash of this file : cached schemas generated by another version are not used
+def tool_version():
+    global source_hash
     
-    #Variables to pass to filter_records function
-    unknown_header, unknown_header_2, limit, payload = [], [], [], []
+    if source_hash is None:
+        with open(os.path.abspath(__file__), 'rb') as source:
+            source_hash = hashlib.sha256(source.read()).hexdigest()
     
-    record_infos_2 = str(mainfile)
+    return source_hash
 
-    if scenario == 0:
-        record_infos_0 = 'Scenario 0 : non-deleted or non-overwritten (journal files) records'
-        z=3
-    elif scenario == 1:
-        record_infos_0 = 'Scenario 1 : deleted records overwritten until type 2'
-        z=2
-    elif scenario == 2:
-        record_infos_0 = 'Scenario 2 : deleted records overwritten until type 1'
-        z=2
-    elif scenario == 3:
-        record_infos_0 = 'Scenario 3 : deleted records overwritten until serial types array length'
-        z=3
-    elif scenario == 4:
-        record_infos_0 = 'Scenario 4 : deleted records overwritten until part of serial types array length'
-        z=3
-    elif scenario == 5:
-        record_infos_0 = 'Scenario 5 : deleted records overwritten until part of rowid'
-        z=4
-    
 
-    #Open mainfile in binary format and reading mode
-    with open(open_file, 'r+b') as mm:
-        
-        #Until end of the match
-        count = 0
 
-        #Go to start of the match
-        mm.seek(a)
-        
-        #If the record is overwritten by a freeblock, read 2 bytes (next freeblock offset) then 2 bytes (length of this freeblock)
-        if freeblock:
-            byte = int(struct.unpack('>H', mm.read(2))[0])
-            unknown_header.append(byte)
-            unknown_header_2.append(byte)
-            count+=2
-            
-            byte = int(struct.unpack('>H', mm.read(2))[0])
-            unknown_header.append(byte)
-            unknown_header_2.append(byte)
-            count+=2
 
+#Function that returns the key of the schema of a config.json file : hash of the config's content and the tool version
+#Keywords (--keyword, --keywords-file) are not part of the key : they are searched apart from the record regexes (find_keywords), so the regexes generated are the same whatever the keywords and one cached schema serves every run
+def schema_key(configfile):
+    with open(configfile, 'rb') as config:
+        content = config.read()
 
-        #While not end of the match
-        while count <= (b-a-1):
-            
-            #Before serial types part (start header length): append(byte) to unknown_header
-            if len(unknown_header) < len_start_header:
-
-                #Read byte by byte, convert in integer, and append to unknown_header list
-                byte = int(struct.unpack('>B', mm.read(1))[0])
-               
-                #If byte < 0x80
-                if byte < 128:
-                    unknown_header.append(byte)
-                    unknown_header_2.append(byte)
-                    count+=1
-                
-                #Else, handle Huffman encoding until 9 successive bytes
-                else:
-                    cont1 = int(struct.unpack('>B', mm.read(1))[0])
-                    byte1 = int(huffmanEncoding(byte, cont1),16)
-                    if cont1 < 128:
-                        unknown_header.append(byte1)
-                        unknown_header_2.append(byte1)
-                        count+=2
-                    else:
-                        cont2 = int(struct.unpack('>B', mm.read(1))[0])
-                        byte2 = int(huffmanEncoding(byte1, cont2),16)
-                        count+=2
-                        if cont2 < 128:
-                            unknown_header.append(byte2)
-                            unknown_header_2.append(byte2)
-                            count+=1
-                        else:
-                            count+=1
-                            cont3 = int(struct.unpack('>B', mm.read(1))[0])
-                            byte3 = int(huffmanEncoding(byte2, cont3),16)
-                            if cont3 < 128:
-                                unknown_header.append(byte3)
-                                unknown_header_2.append(byte3)
-                                count+=1
-                            else:
-                                count+=1
-                                cont4 = int(struct.unpack('>B', mm.read(1))[0])
-                                byte4 = int(huffmanEncoding(byte3, cont4),16)
-                                if cont4 < 128:
-                                    unknown_header.append(byte4)
-                                    unknown_header_2.append(byte4)
-                                    count+=1
-                                else:
-                                    count+=1
-                                    cont5 = int(struct.unpack('>B', mm.read(1))[0])
-                                    byte5 = int(huffmanEncoding(byte4, cont5),16)
-                                    if cont5 < 128:
-                                        unknown_header.append(byte5)
-                                        unknown_header_2.append(byte5)
-                                        count+=1
-                                    else:
-                                        count+=1
-                                        cont6 = int(struct.unpack('>B', mm.read(1))[0])
-                                        byte6 = int(huffmanEncoding(byte5, cont6),16)
-                                        if cont6 < 128:
-                                            unknown_header.append(byte6)
-                                            unknown_header_2.append(byte6)
-                                            count+=1
-                                        else:
-                                            count+=1
-                                            cont7 = int(struct.unpack('>B', mm.read(1))[0])
-                                            byte7 = int(huffmanEncoding(byte6, cont7),16)
-                                            if cont7 < 128:
-                                                unknown_header.append(byte7)
-                                                unknown_header_2.append(byte7)
-                                                count+=1
-                                            else:
-                                                count+=1
-                                                cont8 = int(struct.unpack('>B', mm.read(1))[0])
-                                                byte8 = int(huffmanEncoding(byte7, cont8),16)
-                                                if cont8 < 128:
-                                                    unknown_header.append(byte8)
-                                                    unknown_header_2.append(byte8)
-                                                    count+=1
-                                                else:
-                                                    count+=1
-                                                    byte9 = int(huffmanEncoding(byte7, cont8),16)
-                                                    unknown_header.append(byte9)
-                                                    unknown_header_2.append(byte9)
-            
-            
-            #Serial types part : append(serialTypes(byte)) to unknown_header and not decoded bytes to unknown_header_2
-            else:
-                
-                #Append limit to list of limits to know how many bytes takes the start of the header (because 3 integers are not necessarily only 3 bytes)
-                limit.append(count)
-                
-                #Read byte by byte, convert in integer, and append to unknown_header list
-                byte = int(struct.unpack('>B', mm.read(1))[0])
-                
-                #If byte < 0x80
-                if byte < 128:
-                    unknown_header.append(serialTypes(byte))
-                    unknown_header_2.append(byte)
-                    count+=1
-                
-                #Else, handle Huffman encoding until 9 successive bytes
-                else:
-                    cont1 = int(struct.unpack('>B', mm.read(1))[0])
-                    byte1 = int(huffmanEncoding(byte, cont1),16)
-                    if cont1 < 128:
-                        unknown_header.append(serialTypes(byte1))
-                        unknown_header_2.append(byte1)
-                        count+=2
-                    else:
-                        cont2 = int(struct.unpack('>B', mm.read(1))[0])
-                        byte2 = int(huffmanEncoding(byte1, cont2),16)
-                        count+=2
-                        if cont2 < 128:
-                            unknown_header.append(serialTypes(byte2))
-                            unknown_header_2.append(byte2)
-                            count+=1
-                        else:
-                            count+=1
-                            cont3 = int(struct.unpack('>B', mm.read(1))[0])
-                            byte3 = int(huffmanEncoding(byte2, cont3),16)
-                            if cont3 < 128:
-                                unknown_header.append(serialTypes(byte3))
-                                unknown_header_2.append(byte3)
-                                count+=1
-                            else:
-                                count+=1
-                                cont4 = int(struct.unpack('>B', mm.read(1))[0])
-                                byte4 = int(huffmanEncoding(byte3, cont4),16)
-                                if cont4 < 128:
-                                    unknown_header.append(serialTypes(byte4))
-                                    unknown_header_2.append(byte4)
-                                    count+=1
-                                else:
-                                    count+=1
-                                    cont5 = int(struct.unpack('>B', mm.read(1))[0])
-                                    byte5 = int(huffmanEncoding(byte4, cont5),16)
-                                    if cont5 < 128:
-                                        unknown_header.append(serialTypes(byte5))
-                                        unknown_header_2.append(byte5)
-                                        count+=1
-                                    else:
-                                        count+=1
-                                        cont6 = int(struct.unpack('>B', mm.read(1))[0])
-                                        byte6 = int(huffmanEncoding(byte5, cont6),16)
-                                        if cont6 < 128:
-                                            unknown_header.append(serialTypes(byte6))
-                                            unknown_header_2.append(byte6)
-                                            count+=1
-                                        else:
-                                            count+=1
-                                            cont7 = int(struct.unpack('>B', mm.read(1))[0])
-                                            byte7 = int(huffmanEncoding(byte6, cont7),16)
-                                            if cont7 < 128:
-                                                unknown_header.append(serialTypes(byte7))
-                                                unknown_header_2.append(byte7)
-                                                count+=1
-                                            else:
-                                                count+=1
-                                                cont8 = int(struct.unpack('>B', mm.read(1))[0])
-                                                byte8 = int(huffmanEncoding(byte7, cont8),16)
-                                                if cont8 < 128:
-                                                    unknown_header.append(serialTypes(byte8))
-                                                    unknown_header_2.append(byte8)
-                                                    count+=1
-                                                else:
-                                                    count+=1
-                                                    byte9 = int(huffmanEncoding(byte7, cont8),16)
-                                                    unknown_header.append(serialTypes(byte9))
-                                                    unknown_header_2.append(byte9)
+    return hashlib.sha256(b'\x00'.join([content, tool_version().encode('utf-8')])).hexdigest()
 
-        
-        #Return list of unknown headers and related variables
-        return [a, b, table, fields_regex, unknown_header, unknown_header_2, limit, open_file, payload, record_infos_0, str(a), record_infos_2, scenario, z]
 
 
 
+#Function that returns the path of the cached schema of a config.json file, keyed by schema_key
+def schema_cache_path(configfile, cache_dir):
+    return os.path.join(cache_dir, 'schema_' + schema_key(configfile) + '.pickle')
 
 
 
-#Function that keeps potential records and discard the rest
-def filter_records(a, b, table, fields_regex, unknown_header, unknown_header_2, limit, open_file, payload, record_infos_0, record_infos_1, record_infos_2, scenario, z):
-    
-    #Payload content to fill
-    payload = []
 
-    #Return potential records header and related variables
-    return_value = [b, table, fields_regex, unknown_header, unknown_header_2, open_file, payload, record_infos_0, record_infos_1, record_infos_2, scenario, z]
+#Function that loads the schema of a config.json file from the cache (cache_dir) or generates it, then compiles its regexes
+#Warm runs skip generate_schema/build_regex; compiled regexes are not cached because the regex module compiles them again when unpickled
+def load_schema(configfile, cache_dir=None, compile_regexes=True):
+    schema = None
 
-    #Open mainfile in binary format and reading mode
-    with open(open_file, 'r+b') as mm:
-        
-        #If limit is an empty list, header only contains start of header and is therefore a non-valid header
-        if not limit:
+    #Cached schema, touched to mark it as recently used (eviction of least recently used schemas)
+    if cache_dir:
+        cache_path = schema_cache_path(configfile, cache_dir)
+        try:
+            with open(cache_path, 'rb') as cache:
+                schema = pickle.load(cache)
+            os.utime(cache_path)
+        except FileNotFoundError:
             pass
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            schema = None
+
+    #Generate schema, and write it to the cache (temporary file renamed, so that other processes never read a partial file)
+    if schema is None:
+        schema = generate_schema(configfile)
         
-        #Else: may be a valid header
-        else:
-            
-            #For each scenario
-            
-            #If scenario == 0
-            #If the payload length is equal to the sum of each type length plus the length of the serial types array AND the sum of all types is not equal to 0
-            #AND the serial types array length is equal to the number of bytes from the serial types array length 
-            #AND the length of the header is > 3 (payload length, rowid, serial types array length, type1)
-            if (scenario==0) and ((unknown_header[0] == sum(unknown_header[2:])) and (sum(unknown_header[3:]) != 0) and (len(unknown_header) > 3) and ((b-a-limit[0]) == ((unknown_header[2]-1) or (unknown_header[2]-2)))):
-                    if return_value != '':
-                        return return_value
-            
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                temporary_path = '%s.%s.tmp' % (cache_path, os.getpid())
+                with open(temporary_path, 'wb') as cache:
+                    pickle.dump(schema, cache, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary_path, cache_path)
+            except OSError as e:
+                print('\n\n', 'Schema cache not written: ', e, '\n\n')
 
+    #Compile regexes to be usable, and register the tables of each scenario : matches of find_matches only keep the index of their table in the registry of their scenario
+    if compile_regexes:
+        for tables_regexes in schema['tables_regexes']:
+            for table_regex in tables_regexes:
+                for fields_regex in table_regex.values():
+                    fields_regex[2] = re.compile(fields_regex[2])
+        schema['tables_registry'] = [[(table, fields_regex) for table_regex in tables_regexes for table, fields_regex in table_regex.items()] for tables_regexes in schema['tables_regexes']]
 
-            #If scenario == 1
-            #Then we have to assume what type1 is since it's overwritten (the regex is [next freeblock, actual freeblock length, type2])
-            #WARNING: more false positives because more options
-            #WARNING: more duplicates if 2 or more tables with same number of columns --> will try for each potential type1
-            
-            #If type1 is an integer or a floating, then a number from 0-9 is missing on first position on the header
-            elif ((scenario==1) and ((fields_regex[1])[0] == 'integer' or (fields_regex[1])[0] == 'integer_not_null' or (fields_regex[1])[0] == 'real' or (fields_regex[1])[0] == 'real_not_null') and (((sum(unknown_header[2:]) + (b-a)) <= unknown_header[1] <= (sum(unknown_header[2:]) + (b-a) + 9)))):
-                
-                #x is the unknown integer
-                x = unknown_header[1] - sum(unknown_header[2:]) - (b-a)
-                
-                if x >= 0:
-                    #Insert it on third place of the header because type1 follows the freeblock in this scenario
-                    unknown_header.insert(2, x)
-                    if return_value != '':
-                        return return_value
-    
+    return schema
 
-            #If type1 is an integer primary key, then a 0 is missing on first position on the header
-            elif ((scenario==1) and ((fields_regex[1])[0] == 'zero') and ((sum(unknown_header[2:]) + (b-a+1)) == unknown_header[1])):
-                x = 0
-                unknown_header.insert(2, x)
-                if return_value != '':
-                    return return_value
-            
+
+
+
+#Function that removes least recently used schemas from the cache, keeping at most cache_size schemas (and at least the ones of this run)
+def prune_schema_cache(cache_dir, cache_size, keep=()):
+    try:
+        cached = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.startswith('schema_') and name.endswith('.pickle')]
+    except OSError:
+        return
     
-            #If type1 is boolean, then a 8=0 or a 9=1 is missing on first position on the header
-            #Since the 8 or 9 information is enough, we don't find it further on the record payload, so it doesn't change its length (x=0)
-            #So, if it was overwritten as type1, we cannot know if it was a 8 or a 9 (True or False) --> not recovered
-            elif ((scenario==1) and ((fields_regex[1])[0] == 'boolean' or (fields_regex[1])[0] == 'boolean_not_null') and ((sum(unknown_header[2:]) + (b-a+1)) == unknown_header[1])):
-                x = 0
-                unknown_header.insert(2, x)
-                if return_value != '':
-                    return return_value
-                    
-            
-            #If type1 is a blob, then an even number is missing on first position on the header
-            elif ((scenario==1) and ((fields_regex[1])[0] == 'blob' or (fields_regex[1])[0] == 'blob_not_null') and ((unknown_header[1] - ((sum(unknown_header[2:]) + (b-a+1)))) % 2 == 0)):
-                x = (unknown_header[1] - ((sum(unknown_header[2:]) + (b-a+1))))
-                if x >= 0:
-                    unknown_header.insert(2, x)
-                    if return_value != '':
-                        return return_value
-                    
+    #Schemas of other runs, most recently used first
+    cached = [path for path in cached if path not in keep]
+    cached.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0, reverse=True)
+    
+    for path in cached[max(cache_size-len(keep), 0):]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
-            #If type1 is a text, then an odd number is missing on first position on the header
-            elif ((scenario==1) and ((fields_regex[1])[0] == 'text' or (fields_regex[1])[0] == 'text_not_null') and ((unknown_header[1] - ((sum(unknown_header[2:]) + (b-a+1)))) % 2 != 0)):
-                x = (unknown_header[1] - ((sum(unknown_header[2:]) + (b-a+1))))
-                if x >= 0:
-                    unknown_header.insert(2, x)
-                    if return_value != '':
-                        return return_value
-                    
 
-            #Else, if type1 is a numeric, a numeric not null, a numeric date or a numeric date not null, then the value can be anything
-            elif ((scenario==1) and ((fields_regex[1])[0] == 'numeric' or (fields_regex[1])[0] == 'numeric_not_null' or (fields_regex[1])[0] == 'numeric_date' or (fields_regex[1])[0] == 'numeric_date_not_null')):
-                x = (unknown_header[1] - ((sum(unknown_header[2:]) + (b-a+1))))
-                if x >= 0:
-                    unknown_header.insert(2, x)
-                    if return_value != '':
-                        return return_value
 
 
+#Function that returns the fingerprint of the content of a file : hash of the whole file if it's small, else hash of blocks spread over the file (first and last blocks included)
+#with its size and modification time, so that hashing a huge file only reads a few MB
+def file_fingerprint(path):
+    stat = os.stat(path)
+    digest = hashlib.blake2b(str(stat.st_size).encode('utf-8'), digest_size=16)
 
-            #If scenario == 2
-            #WARNING: false positives with 1 and 2-columns headers that can easily match
-            
-            #If the freeblock length is equal to the sum of each type length plus the length of the serial types array
-            #AND the sum of all types is not equal to
-            elif (scenario == 2) and (((sum(unknown_header[2:]) + (b-a)) == (unknown_header[1])) and ((sum(unknown_header[2:]) != 0))):
-                if return_value != '':
-                    return return_value
+    with open(path, 'rb') as file:
+        if stat.st_size <= results_full_hash_size:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        else:
+            digest.update(str(stat.st_mtime_ns).encode('utf-8'))
+            step = (stat.st_size - results_hash_block_size) / (results_hash_blocks - 1)
+            for n in range(results_hash_blocks):
+                file.seek(int(n * step))
+                digest.update(file.read(results_hash_block_size))
 
+    return digest.hexdigest()
 
 
-            #If scenario == 3
-            
-            #If the freeblock length is equal to the sum of each type length plus the length of the serial types array
-            #AND the sum of all types is not equal to 0 AND the length of the header is > 3 (next fb, actual fb, serial types array length, type1)
-            elif (scenario == 3) and (((sum(unknown_header[2:]) + 4) == (unknown_header[1])) and ((sum(unknown_header[2:]) != 0)) and (len(unknown_header) > 3)):
-                if return_value != '':
-                    return return_value
 
 
+#Function that returns the path of the cached records of a file, keyed by the fingerprint of the file, the config.json file and the tool version (schema_key) and the options that change the records carved
+def results_cache_path(results_dir, open_file, configfile, options):
+    key = hashlib.sha256(b'\x00'.join([file_fingerprint(open_file).encode('utf-8'), schema_key(configfile).encode('utf-8'), repr(options).encode('utf-8')])).hexdigest()
+    return os.path.join(results_dir, 'results_' + key + '.pickle')
 
-            #If scenario == 4
-            #We assume serial types array length cannot be > 2 bytes, otherwise too much columns, so here 1 byte is overwritten, 1 not
-            
-            #If the second part of the serial types array length is < than 128 (if it's > 128, it's not a second part of the serial types array length)
-            #AND if the freeblock length is NOT equal to the sum of each type length plus the length of PART of the serial types array
-            #AND the freeblock length is equal to the sum of each type length plus the length until serial types plus the length in bytes of serial types
-            #AND the sum of all types is not equal to 0 AND the length of the header is > 3 (next fb, actual fb, part of serial types array length, type1)
-            elif (scenario == 4) and (((sum(unknown_header[2:]) + 4) != (unknown_header[1])) and (unknown_header[2] < 128) and (unknown_header[1] == (sum(unknown_header[2:])+128+4-1)) and (len(unknown_header) > 3)):
-                if return_value != '':
-                    return return_value
-            
 
 
-            #If scenario == 5
-            #This scenario also covers SCENARIO 6 : if payload length is 4 bytes --> record starts at rowid
-            #As rowid can be anything from 1-9 bytes, starting at part of it or starting at the start of rowid does not change anything
-            #If payload length is exactly 4 bytes or more in length, the record is greater than 512MB, which is rare
-            
-            #If the freeblock length is equal to the sum of each type length plus the length until serial types
-            #AND the sum of all types is not equal to 0 AND the length of the header is > 4 (next fb, actual fb, part of rowid, serial types array length, type1)
-            elif (scenario == 5) and ((unknown_header[1] == (sum(unknown_header[3:])+(limit[0]-1))) and ((sum(unknown_header[3:]) != 0)) and (len(unknown_header) > 3)):
-                if return_value != '':
-                    return return_value
-            
-            
 
-            #Else, discard record
-            else:
-                return None
+#Function that yields the records of each window (records, (scenario, window start, window end)) of cached results, one window at a time
+#A truncated or corrupt file raises an exception of pickle.load (see check_results)
+def read_results(results_path):
+    with open(results_path, 'rb') as results:
+        size = os.fstat(results.fileno()).st_size
+        while results.tell() < size:
+            yield pickle.load(results)
 
 
 
 
-#Function that decodes the record payload based on the possible headers
-def decode_record(b, table, fields_regex, unknown_header, unknown_header_2, open_file, payload, record_infos_0, record_infos_1, record_infos_2, scenario, z):
-    
-    #Open mainfile in binary format and reading mode
-    with open(open_file, 'r+b') as mm:
+#Function that checks that the whole cached results of a file can be read (read_results) : a missing, truncated or corrupt file is a miss, and a truncated or corrupt file is removed from the cache
+def check_results(results_path):
+    try:
+        for window in read_results(results_path):
+            pass
+        return True
+    except FileNotFoundError:
+        return False
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+        print('\n\n', 'Results cache not read: ', results_path, e, '\n\n')
+        try:
+            os.remove(results_path)
+        except OSError:
+            pass
+        return False
+
+
+
+
+#Function that removes least recently used results from the results cache, keeping at most cache_size bytes (and at least the results of this run)
+def prune_results_cache(results_dir, cache_size, keep=()):
+    try:
+        cached = [os.path.join(results_dir, name) for name in os.listdir(results_dir) if name.startswith('results_') and name.endswith('.pickle')]
+    except OSError:
+        return
+
+    #Results of other runs, most recently used first
+    cached = [path for path in cached if path not in keep]
+    cached.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0, reverse=True)
     
-        #Go to the end of the match to start reading payload content that comes just after the header/match
-        mm.seek(b)
-        
-        #For each field's length of the record
-        for l in ((unknown_header)[z:]):
-            
-            #Read bytes for that length and decode it according to encoding : 
-            #e.g. potential header = [48, 42, 8, 0, 24, 7, 1, 0, 8, 0] 
-            #--> read the following number of bytes from type1 [0, 24, 7, 1, 0, 8, 0]
-            payload_field = mm.read(l)
-            
-            #Append the content to payload list :
-            #e.g. [0, 24, 7, 1, 0, 8, 0] --> ['', 'https://www.youtube.com/', 'YouTube', 3, '', 13263172804027223, '']
-            payload.append(payload_field)
+    total_size = 0
+    for path in cached:
+        try:
+            total_size += os.path.getsize(path)
+            if total_size > cache_size:
+                os.remove(path)
+        except OSError:
+            pass
 
 
+
+
+#Function that returns the number of CPUs this process can really use, according to its CPU affinity and to the cgroup CPU quota (e.g. docker --cpus)
+def available_cpus():
+    
+    #CPUs the process is allowed to run on
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = cpu_count()
+
+    #cgroup v2 : cpu.max contains "quota period" or "max period" if there is no quota
+    try:
+        with open('/sys/fs/cgroup/cpu.max', 'r') as cpu_max:
+            quota, period = cpu_max.read().split()[:2]
+        if quota != 'max':
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        #cgroup v1 : quota is -1 if there is no quota
         try:
-            #For each identifying type per column
-            for n,i in enumerate(fields_regex[1]):
-                
-                #If type is zero (INTEGER PRIMARY KEY = alias for rowid)
-                if i == 'zero':
-                    #Then if the record is intact we can retrieve the rowid from the header (second place)
-                    if scenario == 0:
-                        try:
-                            payload[n] = unknown_header[1]
-                        except IndexError:
-                            pass
-                    #For other scenarios, the rowid is mostly/entirely overwritten
-                    else:
-                        payload[n] = 'rowid not recovered'
-                
-                #If type is a boolean or integer or real
-                elif i == 'boolean' or i == 'boolean_not_null' or i == 'integer' or i == 'integer_not_null' or i == 'real' or i == 'real_not_null':
-                    #Then convert bytes into integers
-                    try:
-                        payload[n] = int.from_bytes(payload[n], byteorder='big', signed=True)
-                    except IndexError:
-                        pass
-                    
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'r') as cfs_quota, open('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'r') as cfs_period:
+                quota, period = int(cfs_quota.read()), int(cfs_period.read())
+            if quota > 0:
+                cpus = min(cpus, math.ceil(quota / period))
+        except (OSError, ValueError):
+            pass
 
-                    #Since for scenario 1 type1 is missing in unknown_header_2 but not in unknown_header (it has been added), we have to go one index back
-                    if scenario == 1:
-                        z = 1
-                    
-                    #If in unknown_header_2 not decoded there was a 7, then it's a floating point
-                    #If there was an 8, then it's a 0 in the record
-                    #If there was a 9, then it's a 1 in the record
-                    try:
-                        
-                        if unknown_header_2[z+n] == 7:
-                            #Convert to binary
-                            payload[n] = bin(payload[n])
-                            #Unpack as 8-bytes floating point
-                            payload[n] = struct.unpack('!d', struct.pack('!q', int(payload[n], 2)))[0]
-                        
-                        elif unknown_header_2[z+n] == 8:
-                            payload[n] = 0
-                        
-                        elif unknown_header_2[z+n] == 9:
-                            payload[n] = 1
-                    
-                    except IndexError:
-                        pass
-                
-                #If type contains 'DATE'
-                elif i == 'numeric_date' or i == 'numeric_date_not_null':
-                    try:
-                        #Then try to convert it from a 4-byte integer (e.g. Julian day number expressed as an integer, unixepoch, ...)
-                        if unknown_header_2[z+n] == 4:
-                            payload[n] = int.from_bytes(payload[n], byteorder='big', signed=False)
-                        #Else it's a string value, so decode it from utf-8 (e.g. YYYY-MM-DD HH:MM:SS.SSS)
-                        else:
-                            try:
-                                payload[n] = payload[n].decode('utf-8', errors='ignore')
-                                #Sanitize SQL comments and single quotes
-                                payload[n] = payload[n].replace("'", " ")
-                                payload[n] = payload[n].replace("--", "  ")
-                            except IndexError:
-                                pass
-                    except IndexError:
-                        pass
-                
-            
-                #For other types, decode it as a string from utf-8
-                else:
-                    try:
-                        payload[n] = payload[n].decode('utf-8', errors='ignore')
-                        #Sanitize SQL comments and single quotes
-                        payload[n] = payload[n].replace("'", " ")
-                        payload[n] = payload[n].replace("--", "  ")
-                    except IndexError:
-                        pass
-        
-        except IndexError:
-            pass                
+    return max(1, cpus)
 
 
-        #Add information to information columns before the real table columns to specify the file from which the record is carved, its offset on the file and the scenario
-        payload.insert(0, record_infos_2)
-        payload.insert(0, record_infos_1)
-        payload.insert(0, record_infos_0)
 
 
-        #For overwritten boolean values in scenario 1, we cannot know if True or False
-        if scenario == 1 and ((fields_regex[1])[0] == 'boolean' or (fields_regex[1])[0] == 'boolean_not_null'):
-            payload[3] == 'boolean value not recovered'
+#Function run once by each worker process of the pool when it starts : loads the schemas (compiled regexes) of all config files, from the cache written by the main process,
+#and builds the searcher of the keywords (list of keywords or None)
+#Tasks then only give the config file path, instead of sending the compiled regexes to workers for each task
+def init_worker(config_files, keywords, cache_dir=None, prefilter=True, access='mmap'):
+    global worker_schemas, worker_prefilter, worker_keywords, worker_access
+    worker_schemas = {configfile:load_schema(configfile, cache_dir) for configfile in config_files}
+    worker_prefilter = prefilter
+    worker_access = access
+    worker_keywords = build_keywords(keywords) if keywords else None
 
-        
-        #If record contains the same number of columns as the table it matched with, append its INSERT statement to statements list
-        if len(fields_regex[0]) == len(payload):
-            #For columns' special names escaped with [], it must be removed to make an insert
-            fields_tuple = str(tuple(fields_regex[0]))
-            if table != "[" or table != "]":
-                fields_tuple = fields_tuple.replace('[', '')
-                fields_tuple = fields_tuple.replace(']', '')
-            statement = "".join(["INSERT INTO", " ", table, fields_tuple, " VALUES ", str(tuple(payload))])
 
-            #Return the INSERT STATEMENT to write to output database
-            return statement
 
 
+#Function that returns the keywords given with --keyword and in the file given with --keywords-file (one keyword per line), without duplicates, or None if there is none
+def read_keywords(keywords, keywords_file=None):
+    keywords = list(keywords or [])
+    
+    if keywords_file:
+        with open(keywords_file, 'r', encoding='utf-8') as file:
+            keywords += [line.rstrip('\r\n') for line in file]
 
+    keywords = list(OrderedDict.fromkeys(keyword for keyword in keywords if keyword))
 
-#Main function with command-line arguments 
-def main(args):
+    return keywords or None
 
-    #Retrieve argument user provided for --linked
-    linked = true_false(args.linked)
 
-    #Retrieve config.json file, files or directory of files given as input
 
-    #List of --config files and list of their paths
-    config_files, config_files_paths = [], []
 
-    #If it's a directory
-    if os.path.isdir(args.config[0]):
-        #Look for files inside
-        for parent, dirnames, filenames in os.walk(args.config[0]):
-            for fn in filenames:
-                #Search for every config.json file
-                if fn.startswith('config_') and fn.endswith('.json'):
-                    #For each config.json file, append their name to config_files list and path to config_files_paths list
-                    filepath = os.path.join(parent, fn)
-                    config_files.append(fn)
-                    config_files_paths.append(filepath)
-        #Convert the directory given as --config in a list of each config.json file path
-        args.config = config_files_paths
-    #If it's file(s)
-    elif os.path.isfile(args.config[0]):
-        #Append their name to config_files list
-        args.config = args.config
-    #Else, nor file nor directory
-    else:
-        print('\n\n', "Nor file(s) nor directory", '\n\n')
+#Function that builds the searcher of a list of keywords : bytes classes of the first keyword_gram bytes of the keywords (byte --> 1 if a keyword has it at this offset, else 0),
+#keywords (utf-8) per first bytes, shortest first, and length of the shortest and of the longest keyword
+def build_keywords(keywords):
+    keywords = sorted(set(keyword.encode('utf-8') for keyword in keywords), key=len)
+    gram = min(keyword_gram, len(keywords[0]))
+
+    conditions = []
+    for offset in range(gram):
+        byte_class = set(keyword[offset] for keyword in keywords)
+        conditions.append((offset, bytes([1 if byte in byte_class else 0 for byte in range(256)])))
+    prefixes = {}
+    for keyword in keywords:
+        prefixes.setdefault(keyword[:gram], []).append(keyword)
+
+    return (gram, conditions, prefixes, len(keywords[0]), len(keywords[-1]))
 
 
 
-    #For each config file provided as --config (can be in a directory)
-    for configfile in args.config:
-        
-        #List of --input files, list of their paths, list of CREATE statements to create output database, list of INSERT statements to insert records in output database
-        main_files, main_files_paths, create_statements, statements = [], [], [], []
-        
-        #Open each config.json file provided containing db infos, each table, column and type of column
-        with open(configfile, 'r') as config_file:
-            #Load content
-            data = json.load(config_file)
-
-            #Close file
-            config_file.close()
-
-        #Db general information is in data[0], all tables and columns/types are in data[1:]
-        for key,value in data[0].items():
-            #Name the output database by retrieving the main database name in config.json db infos
-            if key == "file name":
-                output_db = "".join(['output_', value, '.db'])
-            #Quit script if encoding other than utf-8
-            if key == "text encoding" and value != 'UTF-8':
-                sys.exit("Database encoding is not utf-8!")
-
-        #Retrieve the database schema from data[1:]
-        for element in data[1:]:
-            #To create an output database based on this schema and insert information columns before the real columns 
-            for key,value in element.items():
-                statement = json.dumps(value)
-                statement = statement.replace('}', ')')
-                statement = statement.replace('"', '')
-                statement = statement.replace(':', '')
-                #Replace all INTEGER PRIMARY KEY by INTEGER because they might not be unique : the output database has carved_record_id column as INTEGER PRIMARY KEY autoincrement
-                statement = statement.replace('INTEGER PRIMARY KEY', 'INTEGER')
-                statement = statement.replace('{', '(carved_record_id INTEGER PRIMARY KEY AUTOINCREMENT, carving_scenario_number TEXT, carved_record_offset INTEGER, carved_record_file TEXT, ')
-                #Create tables with statements constructed
-                create_statement = "".join(['CREATE TABLE ', key, ' ', statement])
-                create_statements.append(create_statement)
-
-
-
-        #Retrieve information about tables and columns
-
-        #List of number of columns per table, of types per field, of tables' names & of fields' names
-        fields_numbers, fields_types, tables_names, fields_names = [], [], [], []
-
-        #For each table:
-        for element in data[1:]:
-            #For table_name, fields
-            for key, value in element.items():
-                #Append all the table's names to tables_names list
-                tables_names.append(key)
-                #Number of columns per table
-                fields_number = len(value)
-                #Append number of columns per table to fields_numbers list
-                fields_numbers.append(fields_number)
-                #List of types per table : column name and type
-                for key1, value1 in value.items():
-                    field_name = key1
-                    field_type = value1
-                    #Append column name and type to fields_names and fields_types
-                    fields_names.append(field_name)
-                    fields_types.append(field_type)
 
+#Function that returns the sorted offsets in [start, end) at which one of the keywords starts, in one pass over the bytes whatever the number of keywords (e.g. thousands of IOCs)
+#As in prefilter_candidates, the first bytes of the keywords are checked for a whole chunk at once, the keywords are then only compared at the offsets let through
+def find_keywords(mm, start, end, searcher):
+    gram, conditions, prefixes, min_length, max_length = searcher
+    hits = array('Q')
+
+    for chunk_start in range(start, end, prefilter_chunk_size):
+        chunk_end = min(chunk_start + prefilter_chunk_size, end)
+        size = chunk_end - chunk_start
+        data = mm[chunk_start:chunk_end + gram]
         
-        #Retrieve file, files or directory given as input
-        #For each file provided as input
-        for mainfile in args.input:
-            #If it's a directory
-            if os.path.isdir(mainfile):
-                #Look for files inside
-                for parent, dirnames, filenames in os.walk(mainfile):
-                    #If we want to search only on files linked to database used to create config.json
-                    if linked:
-                        #Search for linked files with same name as main database name (e.g. if mmssms.db, search for mmssms.db, mmssms.db-journal, mmssms.db-wal, etc.)
-                        for fn in filenames:
-                            start = configfile.find('config_') + len('config_')
-                            end = configfile.find('.json')
-                            linked_file = configfile[start:end]
-                            #For each linked file, append their name to main_files list and path to main_files_paths list
-                            if linked_file in fn:
-                                filepath = os.path.join(parent, fn)
-                                main_files.append(fn)
-                                main_files_paths.append(filepath)
-                    #If we want to search on all files (not only linked ones)
-                    else:
-                        for fn in filenames:
-                            filepath = os.path.join(parent, fn)
-                            main_files.append(fn)
-                            main_files_paths.append(filepath)
-            #If it's file(s)
-            elif os.path.isfile(mainfile):
-                #If we want to search only on files linked to database used to create config.json
-                if linked:
-                    start = configfile.find('config_') + len('config_')
-                    end = configfile.find('.json')
-                    linked_file = configfile[start:end]
-                    if linked_file in mainfile:
-                        main_files.append(mainfile)
-                    else:
-                        print('\n\n', str(configfile), 'is not linked to', str(mainfile), '\n\n')
-                #If we want to search on all files (not only linked ones)
-                else:
-                    #Append their name to main_files list
-                    main_files.append(mainfile)
-            #Else, nor file nor directory
-            else:
-                print('\n\n', "Nor file(s) nor directory", '\n\n')
+        mask = -1
+        for offset, table in conditions:
+            mask &= int.from_bytes(data[offset:offset + size].translate(table), 'little')
+            if not mask:
+                break
+        if not mask:
+            continue
 
+        passed = mask.to_bytes(size, 'little')
+        position = passed.find(1)
+        while position != -1:
+            for keyword in prefixes.get(bytes(data[position:position + gram]), ()):
+                if mm[chunk_start + position:chunk_start + position + len(keyword)] == keyword:
+                    hits.append(chunk_start + position)
+                    break
+            position = passed.find(1, position + 1)
 
+    return hits
 
 
-        """Build regexes for each scenario (intact records VS overwritten records according to each scenario)"""
 
-        #Scenario 0
-        header_pattern, headers_patterns, payloads_patterns, regex_constructs, tables_regexes, list_fields, lists_fields, starts_headers = [], [], [], [], [], [], [], []
-        build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern, headers_patterns, payloads_patterns, list_fields, lists_fields, regex_constructs, tables_regexes, starts_headers, scenario=0, freeblock=False)
 
-        #Scenario 1
-        header_pattern_s1, headers_patterns_s1, payloads_patterns_s1, regex_constructs_s1, tables_regexes_s1, list_fields_s1, lists_fields_s1, starts_headers_s1 = [], [], [], [], [], [], [], []
-        build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s1, headers_patterns_s1, payloads_patterns_s1, list_fields_s1, lists_fields_s1, regex_constructs_s1, tables_regexes_s1, starts_headers_s1, scenario=1, freeblock=True)
+#Function that returns the offsets of the keywords of the worker (worker_keywords) in a window of a file, from its start until at least hits_end (end of the payloads to check)
+#Offsets are kept for the next tasks of the window (other scenarios), only the bytes after the ones already searched are searched
+def keyword_hits(open_file, start, hits_end):
+    key = (open_file, start)
+    searched_end, hits = worker_hits.pop(key, (start, array('Q')))
 
-        #Scenario 2
-        header_pattern_s2, headers_patterns_s2, payloads_patterns_s2, regex_constructs_s2, tables_regexes_s2, list_fields_s2, lists_fields_s2, starts_headers_s2 = [], [], [], [], [], [], [], []
-        build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s2, headers_patterns_s2, payloads_patterns_s2, list_fields_s2, lists_fields_s2, regex_constructs_s2, tables_regexes_s2, starts_headers_s2, scenario=2, freeblock=True)
+    if hits_end > searched_end:
+        mm, base = worker_view(open_file, searched_end, hits_end + worker_keywords[4])
+        hits.extend([hit + base for hit in find_keywords(mm, searched_end - base, hits_end - base, worker_keywords)])
+        searched_end = hits_end
 
-        #Scenario 3
-        header_pattern_s3, headers_patterns_s3, payloads_patterns_s3, regex_constructs_s3, tables_regexes_s3, list_fields_s3, lists_fields_s3, starts_headers_s3 = [], [], [], [], [], [], [], []
-        build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s3, headers_patterns_s3, payloads_patterns_s3, list_fields_s3, lists_fields_s3, regex_constructs_s3, tables_regexes_s3, starts_headers_s3, scenario=3, freeblock=True)
+    #Only keep the offsets of the last windows searched
+    while len(worker_hits) >= max_worker_files:
+        worker_hits.popitem(last=False)
+    worker_hits[key] = (searched_end, hits)
 
-        #Scenario 4
-        header_pattern_s4, headers_patterns_s4, payloads_patterns_s4, regex_constructs_s4, tables_regexes_s4, list_fields_s4, lists_fields_s4, starts_headers_s4 = [], [], [], [], [], [], [], []
-        build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s4, headers_patterns_s4, payloads_patterns_s4, list_fields_s4, lists_fields_s4, regex_constructs_s4, tables_regexes_s4, starts_headers_s4, scenario=4, freeblock=True)
+    return hits
 
-        #Scenario 5
-        header_pattern_s5, headers_patterns_s5, payloads_patterns_s5, regex_constructs_s5, tables_regexes_s5, list_fields_s5, lists_fields_s5, starts_headers_s5 = [], [], [], [], [], [], [], []
-        build_regex(fields_numbers, fields_types, fields_names, tables_names, header_pattern_s5, headers_patterns_s5, payloads_patterns_s5, list_fields_s5, lists_fields_s5, regex_constructs_s5, tables_regexes_s5, starts_headers_s5, scenario=5, freeblock=True)
 
 
 
+#Function that returns a read-only memory map of a file, kept open by the worker for all the tasks on this file
+#mmap: file is mapped in memory and its content is internally loaded from disk as needed, so headers and payloads are decoded straight from memory
+#instead of opening the file, seeking and reading it again for each match
+def worker_mmap(open_file):
 
-        """"Search and decode record matches in file"""
+    #Already mapped : move it to the end of the most recently used files
+    if open_file in worker_files:
+        worker_files.move_to_end(open_file)
+        return worker_files[open_file]
 
-        #For each file provided as input
-        #tqdm for progress bar per file processment, its description is the output database's name
-        for mainfile in tqdm.tqdm(main_files, total=len(main_files), position=0, leave=True, desc=output_db):
-            #If a directory is given as input
-            if os.path.isdir(args.input[0]):
-                #The index of file being processed is the same for its path on main_files_paths list
-                index = main_files.index(mainfile)
-                open_file = main_files_paths[index]
-            #Else, no need for path
-            else:
-                open_file = mainfile
-            
-            
-            #Open mainfile in binary format and reading mode
-            with open(open_file, 'r+b') as file:
+    #Only keep the last files used mapped, so that a worker processing a directory does not keep thousands of files open
+    while len(worker_files) >= max_worker_files:
+        path, mm = worker_files.popitem(last=False)
+        mm.close()
 
-                #Variables to pass to find_matches function
-                matches_args, matches_args_s1, matches_args_s2, matches_args_s3, matches_args_s4, matches_args_s5, all_matches_args = [], [], [], [], [], [], []
+    #Open mainfile in binary format and reading mode, the mapping stays valid once the file is closed
+    with open(open_file, 'rb') as file:
+        #An empty file cannot be mapped, use an empty buffer instead
+        if os.fstat(file.fileno()).st_size == 0:
+            mm = b''
+        else:
+            mm = mmap.mmap(file.fileno(), length=0, access=mmap.ACCESS_READ)
 
-                #Process mainfile according to each scenario
-                
-                #For each regex per table
-                for table_regex in tables_regexes:
-                    #For each table and its fields' regexes
-                    for table, fields_regex in table_regex.items():
-                        #Append file name, table name, fields, regexes and scenario number to matches_args list
-                        matches_args.append((mainfile, open_file, table, fields_regex, 0))
-                #Append list of matches arguments to all_matches_args list
-                all_matches_args.append(matches_args)
-                
-                for table_regex_s1 in tables_regexes_s1:
-                    for table_s1, fields_regex_s1 in table_regex_s1.items():
-                        matches_args_s1.append((mainfile, open_file, table_s1, fields_regex_s1, 1))
-                all_matches_args.append(matches_args_s1)
-
-                for table_regex_s2 in tables_regexes_s2:
-                    for table_s2, fields_regex_s2 in table_regex_s2.items():
-                        matches_args_s2.append((mainfile, open_file, table_s2, fields_regex_s2, 2))
-                all_matches_args.append(matches_args_s2)
-                
-                for table_regex_s3 in tables_regexes_s3:
-                    for table_s3, fields_regex_s3 in table_regex_s3.items():
-                        matches_args_s3.append((mainfile, open_file, table_s3, fields_regex_s3, 3))
-                all_matches_args.append(matches_args_s3)
-                
-                for table_regex_s4 in tables_regexes_s4:
-                    for table_s4, fields_regex_s4 in table_regex_s4.items():
-                        matches_args_s4.append((mainfile, open_file, table_s4, fields_regex_s4, 4))
-                all_matches_args.append(matches_args_s4)
-                
-                for table_regex_s5 in tables_regexes_s5:
-                    for table_s5, fields_regex_s5 in table_regex_s5.items():
-                        matches_args_s5.append((mainfile, open_file, table_s5, fields_regex_s5, 5))
-                all_matches_args.append(matches_args_s5)
+    worker_files[open_file] = mm
+    
+    return mm
 
 
-                #For each list of matches arguments
-                for matches_args in all_matches_args:
 
-                    #Start (number of CPUs in the system - 1) worker processes
-                    with multiprocessing.Pool(cpu_count()-1) as pool:
 
-                        #Run find_matches, decode_unknown_header, filter_records, decode_record functions with pool of workers
-                        #Use starmap because functions take multiple arguments
+#Function that returns the file system type of the mount point of a path (/proc/mounts), or None if it is not known
+def file_system_type(path):
+    global mount_points
 
-                        matches = pool.starmap(find_matches, [match_arg for match_arg in matches_args])
-                        #Make a list of matches and not a list of matches per table
-                        matches = [i for i in chain.from_iterable(matches) if i != []]
-                        matches = [i for i in chain.from_iterable(matches) if i != []]
+    if mount_points is None:
+        mount_points = {}
+        try:
+            with open('/proc/mounts') as mounts:
+                for line in mounts:
+                    fields = line.split()
+                    if len(fields) >= 3:
+                        #Spaces, tabs and backslashes of mount points are octal escapes
+                        mount_points[re.sub(r'\\([0-7]{3})', lambda match: chr(int(match.group(1), 8)), fields[1])] = fields[2]
+        except OSError:
+            pass
 
-                        matches = pool.starmap(decode_unknown_header, [match for match in matches])
-            
-                        matches = pool.starmap(filter_records, matches)
-                        #Remove discarded records (None)
-                        matches = [x for x in matches if x != None]
+    #Longest mount point containing the path
+    path = os.path.realpath(path)
+    while path not in mount_points:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return mount_points[path]
 
-                        matches = pool.starmap(decode_record, matches)
 
-                        #Result of decode_record is a list of INSERT statements : append list to statements list
-                        for statement in matches:
-                            statements.append(statement)
-                    
-                    #Print time elapsed for each scenario processing
-                    print('\n', 'Finished processing scenario %s/5 - %s seconds' % (str((matches_args[0])[4]), (time.time() - start_time)))
-        
-            #Close file
-            file.close()
 
 
+#Function that returns how a file is accessed by the workers : mmap (page faults load the pages of the file as they are searched) or read (large reads of each window in a reused buffer)
+#With access auto : small files are read at once, files on network and FUSE file systems are read (a page fault there costs a round trip), other files are mapped
+def file_access(open_file, access):
+    if access != 'auto':
+        return access
 
+    if os.path.getsize(open_file) < read_small_size:
+        return 'read'
+    file_system = file_system_type(open_file) or ''
+    if file_system in read_file_systems or file_system.startswith('fuse.'):
+        return 'read'
+    return 'mmap'
 
-        """"Write records to output database"""
 
-        #If user didn't complete output path with final /
-        if not args.output.endswith("/"):
-            args.output += "/"
 
-        #Connection to output database
-        connection = sqlite3.connect(args.output + output_db, isolation_level=None)
 
-        #Performance improvements
-        connection.execute('PRAGMA journal_mode=OFF')
-        connection.execute('PRAGMA locking_mode=EXCLUSIVE')
-        connection.execute("PRAGMA synchronous=OFF")
-        connection.execute("BEGIN TRANSACTION")
+#Function that prepares the access of a worker to a window [start, end) of a file before carving it
+#mmap : the kernel is told that the window will be read sequentially and soon (madvise MADV_SEQUENTIAL and MADV_WILLNEED), so that its pages are read ahead instead of faulted one by one
+#read : the window is read by blocks of read_block_size into the buffer of the worker, reused for each window (the same window is not read again for the next scenario)
+def load_window(open_file, start, end, access):
+    global worker_window, worker_buffer
 
+    if access == 'mmap':
+        mm = worker_mmap(open_file)
+        if isinstance(mm, mmap.mmap) and hasattr(mm, 'madvise'):
+            page_start = start - start % mmap.PAGESIZE
+            length = min(end, len(mm)) - page_start
+            if length > 0:
+                mm.madvise(mmap.MADV_SEQUENTIAL, page_start, length)
+                mm.madvise(mmap.MADV_WILLNEED, page_start, length)
+        return
 
-        #CREATE tables
-        for create_statement in create_statements:
+    #Open file of the worker : only the file of the last window read is kept open
+    if worker_window and worker_window[0] == open_file:
+        file = worker_window[4]
+    else:
+        if worker_window:
+            worker_window[4].close()
+            worker_window = None
+        file = open(open_file, 'rb', buffering=0)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    size = os.fstat(file.fileno()).st_size
+    end = max(min(end, size), start)
+    if worker_window and worker_window[1] == start and len(worker_window[2]) == end - start:
+        return
+
+    #Buffer resized to the window, allocated again only if it is in use (exported to a regex match)
+    try:
+        if len(worker_buffer) > end - start:
+            del worker_buffer[end - start:]
+        else:
+            worker_buffer.extend(bytes(end - start - len(worker_buffer)))
+    except BufferError:
+        worker_buffer = bytearray(end - start)
+
+    position = 0
+    file.seek(start)
+    with memoryview(worker_buffer) as view:
+        while position < end - start:
+            read = file.readinto(view[position:position + read_block_size])
+            if not read:
+                break
+            position += read
+    
+    #File truncated since its size was read
+    if position < end - start:
+        del worker_buffer[position:]
 
-            try:
-                connection.execute(create_statement)
-            except (sqlite3.OperationalError, sqlite3.IntegrityError) as e:
-                print('\n\n', 'sqlite error: ', e, '\n\n')
-
-
-        #INSERT records
-        for final_statement in statements:
-            if final_statement != None:
-                #If a keyword is provided as optionnal argument
-                if args.keyword:
-                    #Make sure it is really present in the record (lookahead assertion sometimes matches the word after the end of the record)
-                    if args.keyword in final_statement:
-                        try:
-                            connection.execute(final_statement)
-                        except (sqlite3.OperationalError, sqlite3.IntegrityError) as e:
-                            print('\n\n', 'sqlite error: ', e, '\n\n')
-                    else:
+    worker_window = (open_file, start, worker_buffer, start + position >= size, file)
+
+
+
+
+#Function that returns the bytes of a file from start until at least end (or the end of the file), and the offset of these bytes in the file : offset in the buffer = offset in the file - base
+#Memory map of the file (base 0), or with access read, buffer of the window read by load_window if it contains them, else the bytes read on their own
+#Slices of the buffer are bytes (mmap) or bytearray (read)
+def worker_view(open_file, start, end):
+    if worker_window and worker_window[0] == open_file:
+        window_file, base, buffer, at_end, file = worker_window
+        if base <= start and (end <= base + len(buffer) or at_end):
+            return buffer, base
+        return os.pread(file.fileno(), max(end - start, 0), start), start
+
+    return worker_mmap(open_file), 0
+
+
+
+
+#Function that computes how many bytes the header of a record of a given table can take (start of the header and serial types), plus 9 bytes per column of the payload
+#Read after the end of each window, so that the header of a record starting at its end is in the bytes of the window (the regexes can read further, until the end of the file)
+def regex_overlap(fields_regex):
+    #Freeblock (4 bytes) + payload length (9 bytes max) + rowid (9 bytes max) + serial types array length (2 bytes max)
+    start_header = 4 + 9 + 9 + 2
+    #Each serial type of the header is on 9 bytes max, each column of the payload lookahead needs 9 bytes max to be validated
+    return start_header + 18 * len(fields_regex[1])
+
+
+
+
+#Function that splits a file in byte-range windows [start, end) that can be searched in parallel by the workers
+def scan_windows(size, window_size):
+    
+    if window_size <= 0:
+        window_size = size
+
+    return [(start, min(start + window_size, size)) for start in range(0, size, window_size)]
+
+
+
+
+#Function that classifies every page of a SQLite database (page_kinds) from the type byte of its b-tree page header, the overflow chains of the cells and the freelist
+#Returns the page size, the kind of each page (bytearray, index in page_kinds) and the unallocated space and freeblocks of the b-tree pages, or None if the file is not a SQLite database
+def page_map(mm):
+    if len(mm) < 100 or mm[:16] != b'SQLite format 3\x00':
+        return None
+
+    #Page size (1 means 65536) and usable size of each page (without reserved bytes at the end of each page)
+    page_size = struct.unpack('>H', mm[16:18])[0]
+    if page_size == 1:
+        page_size = 65536
+    if page_size < 512 or page_size & (page_size - 1):
+        return None
+    usable = page_size - mm[20]
+    pages = len(mm) // page_size
+    
+    kinds = bytearray(pages)
+    unallocated = []
+
+    #B-tree pages : type byte of the page header, after the 100 bytes of the database header on page 1
+    for page in range(pages):
+        kinds[page] = btree_kinds.get(mm[page * page_size + (100 if page == 0 else 0)], 0)
+
+    #Overflow pages : chains of the cells (table leaf, index leaf and index interior) whose payload does not fit in the page
+    #Maximum local payload (X), minimum local payload (M) : see "B-tree Page Format" of the SQLite file format
+    minimum_local = ((usable - 12) * 32 // 255) - 23
+    for page in range(pages):
+        kind = kinds[page]
+        if kind not in (1, 3, 4):
+            continue
+        
+        page_start = page * page_size
+        header = page_start + (100 if page == 0 else 0)
+        pointers = header + (12 if kind == 4 else 8)
+        cells_number = min(struct.unpack('>H', mm[header+3:header+5])[0], (page_start + usable - pointers) // 2)
+        maximum_local = usable - 35 if kind == 1 else ((usable - 12) * 64 // 255) - 23
+        
+        for pointer in struct.unpack('>%sH' % cells_number, mm[pointers:pointers + 2 * cells_number]):
+            cell = page_start + pointer + (4 if kind == 4 else 0)
+            
+            #Payload of less than 128 bytes (1 byte varint) always fits in the page
+            if pointer + 5 > usable or mm[cell] < 128:
+                continue
+            payload_length, position = varint.read_varint(mm, cell)
+            if kind == 1:
+                rowid, position = varint.read_varint(mm, position)
+            if payload_length <= maximum_local:
+                continue
+            
+            local = minimum_local + ((payload_length - minimum_local) % (usable - 4))
+            if local > maximum_local:
+                local = minimum_local
+            
+            #Follow the chain : first 4 bytes of each overflow page are the next page number (0 at the end of the chain), only on pages that are not b-tree pages
+            overflow = struct.unpack('>I', mm[position+local:position+local+4].rjust(4, b'\x00'))[0]
+            while 0 < overflow <= pages and kinds[overflow-1] == 0:
+                kinds[overflow-1] = 5
+                overflow = struct.unpack('>I', mm[(overflow-1) * page_size:(overflow-1) * page_size + 4])[0]
+
+    #Freelist : trunk pages (next trunk page, number of leaf pages, leaf pages numbers), marked last because freelist leaf pages keep the type byte of their old b-tree page
+    trunk, visited = struct.unpack('>I', mm[32:36])[0], set()
+    while 0 < trunk <= pages and trunk not in visited:
+        visited.add(trunk)
+        kinds[trunk-1] = 6
+        trunk_start = (trunk-1) * page_size
+        next_trunk, leaves_number = struct.unpack('>II', mm[trunk_start:trunk_start + 8])
+        leaves_number = min(leaves_number, usable // 4 - 2)
+        for leaf in struct.unpack('>%sI' % leaves_number, mm[trunk_start + 8:trunk_start + 8 + 4 * leaves_number]):
+            if 0 < leaf <= pages:
+                kinds[leaf-1] = 7
+        trunk = next_trunk
+
+    #Unallocated space (between the cell pointer array and the cell content area) and freeblocks of the b-tree pages
+    #Interior and index pages also keep there the cells of the leaf page they were before a split or a merge
+    for page in range(pages):
+        kind = kinds[page]
+        if kind not in (1, 2, 3, 4):
+            continue
+        
+        page_start = page * page_size
+        header = 100 if page == 0 else 0
+        first_freeblock, cells_number, content_start = struct.unpack('>HHH', mm[page_start+header+1:page_start+header+7])
+        content_start = min(content_start or 65536, usable)
+        pointers_end = header + (12 if kind in (2, 4) else 8) + 2 * cells_number
+        if content_start > pointers_end:
+            unallocated.append((page_start + pointers_end, page_start + content_start))
+        
+        #Freeblocks chain : next freeblock (2 bytes, in increasing order), freeblock size (2 bytes)
+        freeblock = first_freeblock
+        while pointers_end <= freeblock <= usable - 4:
+            next_freeblock, freeblock_size = struct.unpack('>HH', mm[page_start+freeblock:page_start+freeblock+4])
+            unallocated.append((page_start + freeblock, page_start + min(freeblock + max(freeblock_size, 4), usable)))
+            if next_freeblock <= freeblock:
+                break
+            freeblock = next_freeblock
+
+    return page_size, kinds, merge_regions(sorted(unallocated))
+
+
+
+
+#Function that computes the checksum of a WAL file over data (see "Checksum Algorithm" of the WAL file format), starting from the checksum of the previous frame
+#32-bit words are big-endian if the magic number of the WAL header is 0x377f0683, else little-endian
+def wal_checksum(data, checksum_1, checksum_2, big_endian):
+    words = struct.unpack(('>' if big_endian else '<') + 'I' * (len(data) // 4), data)
+    for n in range(0, len(words), 2):
+        checksum_1 = (checksum_1 + words[n] + checksum_2) & 0xffffffff
+        checksum_2 = (checksum_2 + words[n+1] + checksum_1) & 0xffffffff
+    return checksum_1, checksum_2
+
+
+
+
+#Function that returns the regions of a WAL file (see window_regions) : the page image of each frame, without the WAL header and the frame headers, and the bytes after the last whole frame
+#Each page image is tagged with its page number, its frame number and its commit status : committed (up to the last valid commit frame), uncommitted (valid frames after it),
+#invalid (salt or checksum that does not follow the WAL header, e.g. frames of a previous checkpoint)
+#Identical page images are only searched once (first frame), returns also the number of frames. Returns None, 0 if the file is not a WAL file
+def wal_regions(mm):
+    if len(mm) < 32 or struct.unpack('>I', mm[:4])[0] not in (0x377f0682, 0x377f0683):
+        return None, 0
+
+    #WAL header : magic number, file format version, page size, checkpoint sequence number, salts and checksum of the first 24 bytes
+    magic, version, page_size, checkpoint, salt_1, salt_2, checksum_1, checksum_2 = struct.unpack('>8I', mm[:32])
+    big_endian = magic & 1
+    frame_size = 24 + page_size
+    frames_number = (len(mm) - 32) // frame_size
+    
+    checksum = wal_checksum(mm[:24], 0, 0, big_endian)
+    valid = page_size >= 512 and checksum == (checksum_1, checksum_2)
+
+    #Frame header : page number, database size in pages after a commit (0 for other frames), salts, checksum of the frame header (8 first bytes) and page image
+    frames, last_commit = [], 0
+    for frame in range(frames_number):
+        frame_start = 32 + frame * frame_size
+        page, commit, frame_salt_1, frame_salt_2, frame_checksum_1, frame_checksum_2 = struct.unpack('>6I', mm[frame_start:frame_start+24])
+        
+        #A frame is valid if all previous frames are valid, with the salts of the WAL header and the checksum following the previous frame's checksum
+        if valid and (frame_salt_1, frame_salt_2) == (salt_1, salt_2):
+            checksum = wal_checksum(mm[frame_start:frame_start+8] + mm[frame_start+24:frame_start+frame_size], checksum[0], checksum[1], big_endian)
+            valid = checksum == (frame_checksum_1, frame_checksum_2)
+        else:
+            valid = False
+        
+        frames.append((frame_start + 24, page, frame + 1, valid))
+        if valid and commit:
+            last_commit = frame + 1
+
+    regions, images = [], set()
+    for image_start, page, frame, valid in frames:
+        image = hashlib.sha1(mm[image_start:image_start + page_size]).digest()
+        if image in images:
+            continue
+        images.add(image)
+
+        commit = 'invalid' if not valid else 'committed' if frame <= last_commit else 'uncommitted'
+        regions.append((image_start, image_start + page_size, image_start + page_size, (page, frame, commit)))
+
+    if 32 + frames_number * frame_size < len(mm):
+        regions.append((32 + frames_number * frame_size, len(mm), len(mm), None))
+
+    return regions, frames_number
+
+
+
+
+#Function that returns the SQLite checksum of a page record of a rollback journal : nonce of the journal header plus every 200th byte of the page, from its end
+def journal_checksum(page, nonce):
+    return (nonce + sum(page[index] for index in range(len(page) - 200, 0, -200))) & 0xffffffff
+
+
+
+
+#Function that returns the number of page records of a journal segment starting at offset, and the nonce of their checksums
+#Page records are read while their page number is plausible and their checksum follows the nonce (if nonce is None, it's found from the first record, e.g. header zeroed by journal_mode=PERSIST)
+def journal_records(mm, offset, page_size, nonce, records_number, max_page):
+    record_size = page_size + 8
+    number = 0
+    while offset + record_size <= len(mm) and (not records_number or number < records_number):
+        page, = struct.unpack('>I', mm[offset:offset+4])
+        checksum, = struct.unpack('>I', mm[offset+4+page_size:offset+record_size])
+        if not 0 < page <= max_page:
+            break
+        if nonce is None:
+            nonce = (checksum - journal_checksum(mm[offset+4:offset+4+page_size], 0)) & 0xffffffff
+        elif journal_checksum(mm[offset+4:offset+4+page_size], nonce) != checksum:
+            break
+        number += 1
+        offset += record_size
+    return number, nonce
+
+
+
+
+#Function that returns the sector size and page size of a journal whose header is zeroed (journal_mode=PERSIST after a commit) : 
+#the first sector size and page size (page size of the database first) with which the two first page records are plausible and have checksums of the same nonce
+def journal_geometry(mm, page_size=None):
+    page_sizes = ([page_size] if page_size else []) + [2**n for n in range(9, 17) if 2**n != page_size]
+    for page_size in page_sizes:
+        for sector_size in [2**n for n in range(9, 17)]:
+            number = journal_records(mm, sector_size, page_size, None, 2, 0x7fffffff)[0]
+            if number == 2 or (number == 1 and sector_size + 2 * (page_size + 8) > len(mm)):
+                return sector_size, page_size
+    return None, None
+
+
+
+
+#Function that returns the regions of a rollback journal (see window_regions) : the page of each page record, and the bytes around them (journal headers and their padding, page numbers, checksums, bytes after the last page record)
+#searched as the rest of the file, so that a record starting in them is found as without the page records
+#A journal is made of segments : a header (magic number, number of records, nonce of the checksums, initial size of the database in pages, sector size and page size) padded to a sector, then its page records (page number, page, checksum)
+#Each page is tagged with its page number in the database, identical pages (e.g. repeated in several segments) are only searched once, returns also the number of page records
+#A header zeroed by journal_mode=PERSIST is read with the page size of the database (page_size, or found from the page records) and the sector size found from the page records
+#Returns None, 0 if the file is not a journal file
+def journal_regions(mm, page_size=None):
+    magic = b'\xd9\xd5\x05\xf9\x20\xa1\x63\xd7'
+    if len(mm) < 28:
+        return None, 0
+    if mm[:8] != magic:
+        if mm[:28] != bytes(28):
+            return None, 0
+        sector_size, page_size = journal_geometry(mm, page_size)
+        if sector_size is None:
+            return None, 0
+
+    records, offset, end = [], 0, 0
+    while offset + 28 <= len(mm):
+        #Journal header (the number of records is 0 or 0xffffffff if the records go until the end of the journal), the zeroed header of journal_mode=PERSIST is only the first one
+        if mm[offset:offset+8] == magic:
+            records_number, nonce, database_size, sector_size, page_size = struct.unpack('>5I', mm[offset+8:offset+28])
+            if not (512 <= page_size <= 65536 and 512 <= sector_size <= 65536):
+                break
+            records_number = 0 if records_number == 0xffffffff else records_number
+            max_page = 0x7fffffff
+        elif offset == 0:
+            records_number, nonce, max_page = 0, None, 0x7fffffff
+        else:
+            break
+        
+        number, nonce = journal_records(mm, offset + sector_size, page_size, nonce, records_number, max_page)
+        for record in range(number):
+            record_start = offset + sector_size + record * (page_size + 8)
+            records.append((record_start + 4, struct.unpack('>I', mm[record_start:record_start+4])[0]))
+        end = offset + sector_size + number * (page_size + 8)
+        
+        #Next segment starts at the next sector boundary
+        offset = -(-end // sector_size) * sector_size
+        if number == 0:
+            break
+
+    regions, pages, gap_start = [], set(), 0
+    for page_start, page in records:
+        if gap_start < page_start:
+            regions.append((gap_start, page_start, len(mm), None))
+        gap_start = page_start + page_size
+        content = hashlib.sha1(mm[page_start:page_start + page_size]).digest()
+        if content in pages:
+            continue
+        pages.add(content)
+        regions.append((page_start, page_start + page_size, page_start + page_size, (page, None, None)))
+
+    if gap_start < len(mm):
+        regions.append((gap_start, len(mm), len(mm), None))
+
+    return regions, len(records)
+
+
+
+
+#Function that merges sorted byte ranges [start, end) that overlap or touch
+def merge_regions(regions):
+    merged = []
+    for start, end in regions:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+
+
+#Function that returns the byte ranges of a database in which records of a scenario can start, according to its page map (page_map) :
+#scenario 0 in table leaf, freelist and unparseable pages, scenarios 1-5 in freelist and unparseable pages,
+#and every scenario in the unallocated space and freeblocks of b-tree pages (overflow pages and allocated cells of interior and index pages are skipped)
+#Bytes after the last whole page are searched for every scenario
+def scan_regions(size, pages_map, scenario):
+    page_size, kinds, unallocated = pages_map
+    searched = (1, 6, 7, 0) if scenario == 0 else (6, 7, 0)
+    
+    regions = [(page * page_size, (page + 1) * page_size) for page, kind in enumerate(kinds) if kind in searched]
+    regions = sorted(regions + unallocated)
+    if len(kinds) * page_size < size:
+        regions.append((len(kinds) * page_size, size))
+
+    return [(start, end, size, None) for start, end in merge_regions(regions)]
+
+
+
+
+#Function that splits the regions of a file among the windows of the file : regions of each window, clipped to it
+#A region is (start, end, limit, location) : records starting in [start, end) are searched, their regex can read until limit, location is added to their values (or no_location if None)
+def window_regions(regions, windows):
+    windows_regions = []
+    for start, end in windows:
+        windows_regions.append([(max(region_start, start), min(region_end, end), limit, location) for region_start, region_end, limit, location in regions if region_start < end and region_end > start])
+    return windows_regions
+
+
+
+
+#Function that iterates regexes of all tables over a window of the file, finds matches starting in it and adds them to the arrays of matches
+#Every table regex is run on the window, so the file is read once per scenario instead of once per table and scenario
+#Regexes are retrieved from the schemas loaded once by each worker (init_worker)
+#Returns the matches as parallel arrays (id of the table in the registry of the scenario, start, end) and the list of their decoded headers, grouped by table in the order of the registry (see match_arguments)
+#If counters is given, adds the number of positions of the window, of candidates let through by the prefilters, of matches of the regexes and of valid matches, over all tables (and per table if counters has a tables dict)
+#If regions is given (page map of a database, frames of a WAL file, see window_regions), only matches starting in these byte ranges of the window are searched
+#Matches whose header fails the checks of their scenario (structure_rule) are discarded as soon as they are found : if counters is given, the number of matches discarded by each rule is added to counters['discarded']
+#The header of each match is decoded only once, here : the headers of the matches kept are passed on to filter_records (see match_arguments)
+def find_matches(mainfile, open_file, configfile, scenario, start, end, counters=None, regions=None):
+    
+    #Tables and their fields' regexes registered for this scenario
+    tables = worker_schemas[configfile]['tables_registry'][scenario]
+
+    #Matches : table id, start and end of each match (2 + 8 + 8 bytes instead of a tuple of 12 objects per match)
+    tables_ids, starts, ends = array('H'), array('Q'), array('Q')
+
+    #Decoded header of each match kept (unknown_header, unknown_header_2, limit)
+    headers = []
+
+    #Number of matches discarded by each rule of structure_rule
+    discarded = {}
+
+    #Bytes that the header of a record starting at the end of the window can take, read with the window
+    overlap = max([regex_overlap(fields_regex) for table, fields_regex in tables], default=0)
+
+    #Iterate over the bytes of the window (mm : memory map of the file, or window read by load_window) : offsets in mm are offsets in the file - base
+    mm, base = worker_view(open_file, start, end + overlap)
+    size = os.path.getsize(open_file)
+
+    #For each table, search and process each match starting in the window
+    for index, (table, fields_regex) in enumerate(tables):
+        prefilter = fields_regex[3] if worker_prefilter else None
+        type1 = fields_regex[1][0]
+
+        for region_start, region_end, limit, location in (regions if regions is not None else [(start, end, size, None)]):
+            #Only the start of a match is bounded by the window or region : its regex (payload lookahead) can read until the limit of the region or the end of the file, as if the whole file was scanned
+            #With access read, a match reaching the end of the window read (partial match) is matched again in the memory map of the file
+            endpos = min(limit, size)
+            view_end = min(endpos, base + len(mm))
+            partial = view_end < endpos
+            found = len(starts)
+            regex_matches = 0
+            candidates = prefilter_candidates(mm, region_start - base, region_end - base, prefilter) if prefilter else None
+
+            #Regex only tried at the offsets let through by the prefilter of the table : same matches as overlapped=True (at most one match per starting offset)
+            if candidates is not None:
+                for a in candidates:
+                    view, view_base = mm, base
+                    match = fields_regex[2].match(mm, a, view_end - base, concurrent=True, partial=partial)
+                    if match and match.partial:
+                        view, view_base = worker_mmap(open_file), 0
+                        match = fields_regex[2].match(view, a + base, endpos, concurrent=True)
+                    if match:
+                        regex_matches += 1
+                        rule, header = match_rule(view, match.start(), match.end(), scenario, type1)
+                        if rule:
+                            discarded[rule] = discarded.get(rule, 0) + 1
+                        else:
+                            starts.append(match.start() + view_base)
+                            ends.append(match.end() + view_base)
+                            headers.append(header)
+            
+            #Update regex module : since regex 2021.4.4 : overlapped=True finds overlapping matches (match starting at an offset inside another match)
+            else:
+                candidates = range(region_start, region_end)
+                view, view_base, position = mm, base, region_start
+                while position is not None:
+                    view_matches = fields_regex[2].finditer(view, position - view_base, min(endpos, view_base + len(view)) - view_base, overlapped=True, concurrent=True, partial=view_base + len(view) < endpos)
+                    position = None
+                    for match in view_matches:
+                        
+                        #Start and end of match
+                        a = match.start() + view_base
+                        b = match.end() + view_base
+
+                        #Matches starting after the window belong to the next window or region
+                        if a >= region_end:
+                            break
+
+                        #Partial match at the end of the window read : the rest of the region is searched in the memory map of the file
+                        if match.partial:
+                            view, view_base, position = worker_mmap(open_file), 0, a
+                            break
+                        
+                        #Append match to the matches of this table, unless its header is not valid for the scenario
+                        regex_matches += 1
+                        rule, header = match_rule(view, a - view_base, b - view_base, scenario, type1)
+                        if rule:
+                            discarded[rule] = discarded.get(rule, 0) + 1
+                        else:
+                            starts.append(a)
+                            ends.append(b)
+                            headers.append(header)
+
+            tables_ids.extend([index] * (len(starts) - found))
+
+            if counters is not None:
+                counters['positions'] += region_end - region_start
+                counters['candidates'] += len(candidates)
+                counters['matches'] += regex_matches
+                counters['valid'] += len(starts) - found
+                if 'tables' in counters:
+                    table_counters = counters['tables'].setdefault(table, [0, 0, 0])
+                    table_counters[0] += len(candidates)
+                    table_counters[1] += regex_matches
+                    table_counters[2] += len(starts) - found
+
+    if counters is not None and 'discarded' in counters:
+        for rule, number in discarded.items():
+            counters['discarded'][rule] = counters['discarded'].get(rule, 0) + number
+
+    #Return arrays of matches and their headers
+    return tables_ids, starts, ends, headers
+
+
+
+
+#Function that returns the variables to pass to filter_records for a match of find_matches (index in its arrays), its table being resolved from the registry of the scenario and its header being the one decoded by find_matches
+#Tuples are only built when a match is filtered, instead of being kept for every match
+def match_arguments(mainfile, open_file, configfile, scenario, matches, index):
+    tables_ids, starts, ends, headers = matches
+    table, fields_regex = worker_schemas[configfile]['tables_registry'][scenario][tables_ids[index]]
+    unknown_header, unknown_header_2, limit = headers[index]
+    record_infos_0, z = scenarios_infos[scenario]
+    return (starts[index], ends[index], table, fields_regex, unknown_header, unknown_header_2, limit, open_file, [], record_infos_0, str(starts[index]), str(mainfile), scenario, z)
+
+
+
+
+#Function that yields the variables to pass to filter_records for all matches of find_matches (see match_arguments)
+def matches_arguments(mainfile, open_file, configfile, scenario, matches):
+    for index in range(len(matches[0])):
+        yield match_arguments(mainfile, open_file, configfile, scenario, matches, index)
+
+
+
+
+
+
+#Function that returns the first check failed by the header of a match (start of the header and length of each serial type, see decode_header), or None if it passes all the checks of its scenario
+#type1 is the type of the first column of the table (scenario 1 : overwritten by the freeblock length) ; the header is not changed, so that matches can be discarded as soon as they are found (filter_records completes the header of the matches kept)
+#Rules : serial_types (no serial type), payload_length (payload length different from the lengths of the columns and serial types array), freeblock_length (same with the freeblock length), 
+#header_length (serial types array length different from its bytes), serial_types_length (serial types array length of more than 1 byte left), empty_payload (all columns empty), no_column (no serial type after the start of the header)
+def structure_rule(a, b, scenario, type1, unknown_header, limit):
+    if not limit:
+        return 'serial_types'
+
+    if scenario == 0:
+        if unknown_header[0] != sum(unknown_header[2:]):
+            return 'payload_length'
+        if sum(unknown_header[3:]) == 0:
+            return 'empty_payload'
+        if len(unknown_header) <= 3:
+            return 'no_column'
+        if (b-a-limit[0]) != ((unknown_header[2]-1) or (unknown_header[2]-2)):
+            return 'header_length'
+    
+    #Length of type1 (x) deduced from the freeblock length : 0-9 for an integer or a floating, 0 for an integer primary key or a boolean, even for a blob, odd for a text, anything for a numeric
+    elif scenario == 1:
+        x = unknown_header[1] - sum(unknown_header[2:]) - (b-a)
+        if type1 in ('integer', 'integer_not_null', 'real', 'real_not_null'):
+            valid = 0 <= x <= 9
+        elif type1 in ('zero', 'boolean', 'boolean_not_null'):
+            valid = x == 1
+        elif type1 in ('blob', 'blob_not_null'):
+            valid = x >= 1 and (x-1) % 2 == 0
+        elif type1 in ('text', 'text_not_null'):
+            valid = x >= 1 and (x-1) % 2 != 0
+        elif type1 in ('numeric', 'numeric_not_null', 'numeric_date', 'numeric_date_not_null'):
+            valid = x >= 1
+        else:
+            valid = False
+        if not valid:
+            return 'freeblock_length'
+    
+    elif scenario == 2:
+        if sum(unknown_header[2:]) + (b-a) != unknown_header[1]:
+            return 'freeblock_length'
+        if sum(unknown_header[2:]) == 0:
+            return 'empty_payload'
+    
+    elif scenario == 3:
+        if sum(unknown_header[2:]) + 4 != unknown_header[1]:
+            return 'freeblock_length'
+        if sum(unknown_header[2:]) == 0:
+            return 'empty_payload'
+        if len(unknown_header) <= 3:
+            return 'no_column'
+    
+    elif scenario == 4:
+        if sum(unknown_header[2:]) + 4 == unknown_header[1] or unknown_header[1] != sum(unknown_header[2:]) + 128 + 4 - 1:
+            return 'freeblock_length'
+        if unknown_header[2] >= 128:
+            return 'serial_types_length'
+        if len(unknown_header) <= 3:
+            return 'no_column'
+    
+    elif scenario == 5:
+        if unknown_header[1] != sum(unknown_header[3:]) + (limit[0]-1):
+            return 'freeblock_length'
+        if sum(unknown_header[3:]) == 0:
+            return 'empty_payload'
+        if len(unknown_header) <= 3:
+            return 'no_column'
+
+    return None
+
+
+
+
+#Function that decodes the header of a match in the memory map of its file and returns the first check of its scenario it fails (structure_rule) or None, and the decoded header (unknown_header, unknown_header_2, limit)
+def match_rule(mm, a, b, scenario, type1):
+    len_start_header, freeblock = scenarios_headers[scenario]
+    header = varint.decode_header(mm, a, b, len_start_header, freeblock)
+    return structure_rule(a, b, scenario, type1, header[0], header[2]), header
+
+
+
+
+#Function that completes the header of a match kept by find_matches (its checks were done by structure_rule) and returns the potential record
+def filter_records(a, b, table, fields_regex, unknown_header, unknown_header_2, limit, open_file, payload, record_infos_0, record_infos_1, record_infos_2, scenario, z):
+    
+    #Payload content to fill
+    payload = []
+
+    #If scenario == 1
+    #Then we have to assume what type1 is since it's overwritten (the regex is [next freeblock, actual freeblock length, type2])
+    #WARNING: more false positives because more options
+    #WARNING: more duplicates if 2 or more tables with same number of columns --> will try for each potential type1
+    if scenario == 1:
+        
+        #If type1 is an integer or a floating, then a number from 0-9 is missing on first position on the header
+        if (fields_regex[1])[0] in ('integer', 'integer_not_null', 'real', 'real_not_null'):
+            x = unknown_header[1] - sum(unknown_header[2:]) - (b-a)
+        
+        #If type1 is an integer primary key or a boolean, then a 0 (or a 8=0 or a 9=1) is missing on first position on the header
+        #Since the 8 or 9 information is enough, we don't find it further on the record payload, so it doesn't change its length (x=0)
+        #So, if it was overwritten as type1, we cannot know if it was a 8 or a 9 (True or False) --> not recovered
+        elif (fields_regex[1])[0] in ('zero', 'boolean', 'boolean_not_null'):
+            x = 0
+        
+        #If type1 is a blob (even number), a text (odd number), a numeric, a numeric not null, a numeric date or a numeric date not null (anything)
+        else:
+            x = unknown_header[1] - (sum(unknown_header[2:]) + (b-a+1))
+        
+        #Insert it on third place of the header because type1 follows the freeblock in this scenario
+        unknown_header.insert(2, x)
+
+    #Return potential records header and related variables
+    return [b, table, fields_regex, unknown_header, unknown_header_2, open_file, payload, record_infos_0, record_infos_1, record_infos_2, scenario, z]
+
+
+
+
+#Function that decodes the record payload based on the possible headers
+def decode_record(b, table, fields_regex, unknown_header, unknown_header_2, open_file, payload, record_infos_0, record_infos_1, record_infos_2, scenario, z):
+    
+    #Memory map of mainfile kept open by the worker, or window read by the worker
+    payload_length = sum((unknown_header)[z:])
+    mm, base = worker_view(open_file, b, b + payload_length)
+
+    #Read the whole payload content at once, it comes just after the header/match
+    payload_content = bytes(mm[b-base:b-base+payload_length])
+    position = 0
+    
+    #For each field's length of the record
+    for l in ((unknown_header)[z:]):
+        
+        #Take bytes for that length and decode it according to encoding : 
+        #e.g. potential header = [48, 42, 8, 0, 24, 7, 1, 0, 8, 0] 
+        #--> read the following number of bytes from type1 [0, 24, 7, 1, 0, 8, 0]
+        payload_field = payload_content[position:position+l]
+        position += l
+        
+        #Append the content to payload list :
+        #e.g. [0, 24, 7, 1, 0, 8, 0] --> ['', 'https://www.youtube.com/', 'YouTube', 3, '', 13263172804027223, '']
+        payload.append(payload_field)
+
+
+    try:
+        #For each identifying type per column
+        for n,i in enumerate(fields_regex[1]):
+            
+            #If type is zero (INTEGER PRIMARY KEY = alias for rowid)
+            if i == 'zero':
+                #Then if the record is intact we can retrieve the rowid from the header (second place)
+                if scenario == 0:
+                    try:
+                        payload[n] = unknown_header[1]
+                    except IndexError:
                         pass
-                #Else, insert all records
+                #For other scenarios, the rowid is mostly/entirely overwritten
                 else:
-                    try:
-                        connection.execute(final_statement)
-                    except (sqlite3.OperationalError, sqlite3.IntegrityError) as e:
-                        print('\n\n', 'sqlite error: ', e, '\n\n')
-            else:
+                    payload[n] = 'rowid not recovered'
+            
+            #If type is a boolean or integer or real
+            elif i == 'boolean' or i == 'boolean_not_null' or i == 'integer' or i == 'integer_not_null' or i == 'real' or i == 'real_not_null':
+                #Then convert bytes into integers
+                try:
+                    payload[n] = int.from_bytes(payload[n], byteorder='big', signed=True)
+                except IndexError:
+                    pass
+                
+
+                #Since for scenario 1 type1 is missing in unknown_header_2 but not in unknown_header (it has been added), we have to go one index back
+                if scenario == 1:
+                    z = 1
+                
+                #If in unknown_header_2 not decoded there was a 7, then it's a floating point
+                #If there was an 8, then it's a 0 in the record
+                #If there was a 9, then it's a 1 in the record
+                try:
+                    
+                    if unknown_header_2[z+n] == 7:
+                        #Convert to binary
+                        payload[n] = bin(payload[n])
+                        #Unpack as 8-bytes floating point
+                        payload[n] = struct.unpack('!d', struct.pack('!q', int(payload[n], 2)))[0]
+                    
+                    elif unknown_header_2[z+n] == 8:
+                        payload[n] = 0
+                    
+                    elif unknown_header_2[z+n] == 9:
+                        payload[n] = 1
+                
+                except IndexError:
+                    pass
+            
+            #If type contains 'DATE'
+            elif i == 'numeric_date' or i == 'numeric_date_not_null':
+                try:
+                    #Then try to convert it from a 4-byte integer (e.g. Julian day number expressed as an integer, unixepoch, ...)
+                    if unknown_header_2[z+n] == 4:
+                        payload[n] = int.from_bytes(payload[n], byteorder='big', signed=False)
+                    #Else it's a string value, so decode it from utf-8 (e.g. YYYY-MM-DD HH:MM:SS.SSS)
+                    else:
+                        payload[n] = decode_text(payload[n])
+                except IndexError:
+                    pass
+            
+
+            #If type is a blob, keep its bytes as they are
+            elif i == 'blob' or i == 'blob_not_null':
                 pass
 
+        
+            #For other types, decode it as a string from utf-8
+            else:
+                try:
+                    payload[n] = decode_text(payload[n])
+                except IndexError:
+                    pass
+    
+    except IndexError:
+        pass                
+
+
+    #Add information to information columns before the real table columns to specify the file from which the record is carved, its offset on the file and the scenario
+    payload.insert(0, record_infos_2)
+    payload.insert(0, record_infos_1)
+    payload.insert(0, record_infos_0)
+
+
+    #For overwritten boolean values in scenario 1, we cannot know if True or False
+    if scenario == 1 and ((fields_regex[1])[0] == 'boolean' or (fields_regex[1])[0] == 'boolean_not_null'):
+        payload[3] == 'boolean value not recovered'
+
+    
+    #If record contains the same number of columns as the table it matched with, return its values to insert them in the output database
+    #Values are inserted as parameters of a prepared INSERT statement per table, so they don't need to be rendered nor sanitized as SQL text
+    if len(fields_regex[0]) == len(payload):
+        return (table, tuple(payload))
+
+
+
+
+#Function that decodes a text value from utf-8, keeping its original bytes if they are not valid utf-8 (e.g. partly overwritten text)
+def decode_text(value):
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return value
+
+
+
+
+#Function that returns the wall time and CPU time of the process, to time the stages of carve_window (stage_time)
+def stage_clock():
+    return (time.perf_counter(), time.process_time())
+
+
+
+
+#Function that adds the wall time and CPU time elapsed since a stage_clock to a stage of seconds ({stage: [wall, cpu]}), and returns the current stage_clock
+def stage_time(seconds, stage, since):
+    now = stage_clock()
+    times = seconds.setdefault(stage, [0.0, 0.0])
+    times[0] += now[0] - since[0]
+    times[1] += now[1] - since[1]
+    return now
+
+
+
+
+#Function that carves a window of a file for a scenario inside the worker : find_matches (which decodes the headers), filter_records and decode_record are chained on the matches of each table
+#Only the records kept (table and values) are sent back to the main process, instead of every intermediate list of matches
+#Also returns the statistics of the window : number of positions, prefilter candidates, regex matches, records kept by filter_records, records containing a keyword and decoded records (pass rate of each stage),
+#the same numbers per table ({table: [candidates, regex matches, kept, with keywords, decoded]}) and the wall time and CPU time of each stage ({stage: [wall, cpu]})
+#If ipc_stats, adds the size in bytes of the pickled lists that would be sent between processes by separate find/decode/filter/decode stages, and of the records really sent back
+def carve_window(mainfile, open_file, configfile, scenario, start, end, ipc_stats=False, regions=None):
+
+    #List of records (table, values) per table
+    records = []
+
+    ipc = {'matches':0, 'headers':0, 'records':0, 'results':0, 'positions':0, 'candidates':0, 'regex_matches':0, 'valid':0, 'kept':0, 'with_keywords':0, 'decoded':0, 'tables':{}, 'seconds':{}, 'discarded':{}}
+    counters = {'positions':0, 'candidates':0, 'matches':0, 'valid':0, 'tables':{}, 'discarded':ipc['discarded']}
+    seconds = ipc['seconds']
+
+    #Access to the window : read ahead (mmap) or read in the buffer of the worker (read), see --access
+    since = stage_clock()
+    load_window(open_file, start, end + read_overlap, file_access(open_file, worker_access))
+    since = stage_time(seconds, 'load_window', since)
+
+    #Matches of each table starting in the window
+    matches = find_matches(mainfile, open_file, configfile, scenario, start, end, counters, regions)
+    since = stage_time(seconds, 'find_matches', since)
+
+    #Tables of the registry of the scenario, in the order of the matches of find_matches
+    tables_ids = matches[0]
+    tables = [table for table, fields_regex in worker_schemas[configfile]['tables_registry'][scenario]]
+
+    #Start of each region, to find the location of a record (region it starts in)
+    regions_starts = [region[0] for region in regions] if regions else []
+
+    #For each table, from a match to its record (or its discard), one stage after the other
+    for table_id, table in enumerate(tables):
+        table_records = []
+        kept = []
+
+        #Matches of the table are decoded and filtered by chunks : only the records kept are kept in memory
+        first, last = bisect.bisect_left(tables_ids, table_id), bisect.bisect_right(tables_ids, table_id)
+        for chunk_start in range(first, last, match_chunk_size):
+            chunk = [match_arguments(mainfile, open_file, configfile, scenario, matches, index) for index in range(chunk_start, min(chunk_start + match_chunk_size, last))]
+
+            #Headers were checked by find_matches : every match is kept
+            filtered = [filter_records(*match) for match in chunk]
+            kept += [(match[0], record) for match, record in zip(chunk, filtered)]
+            since = stage_time(seconds, 'filter_records', since)
+
+            #Each intermediate list (matches, then decoded headers) was sent back to the main process, then sent again to the workers for the next stage
+            if ipc_stats:
+                ipc['matches'] += 2 * len(pickle.dumps([match[:4] for match in chunk]))
+                ipc['headers'] += 2 * len(pickle.dumps(chunk))
+                ipc['records'] += 2 * len(pickle.dumps([record for record in filtered if record is not None]))
+                since = stage_clock()
+        kept_number = len(kept)
+
+        #With keywords, only records whose payload [b, b + length of the columns) contains the start of a keyword are decoded (the writer checks that a value really contains one)
+        if worker_keywords and kept:
+            min_length = worker_keywords[3]
+            payloads = [(a, record, record[0] + sum(record[3][record[11]:])) for a, record in kept]
+            hits = keyword_hits(open_file, start, max(payload_end for a, record, payload_end in payloads) - min_length + 1)
+            kept = []
+            for a, record, payload_end in payloads:
+                index = bisect.bisect_left(hits, record[0])
+                if index < len(hits) and hits[index] <= payload_end - min_length:
+                    kept.append((a, record))
+            since = stage_time(seconds, 'keywords', since)
+        
+        for a, record in kept:
+            record = decode_record(*record)
+            if record is not None:
+                location = regions[bisect.bisect_right(regions_starts, a) - 1][3] if regions else None
+                table_records.append((record[0], record[1] + (location or no_location)))
+        since = stage_time(seconds, 'decode_record', since)
+        
+        records.append(table_records)
+
+        candidates, regex_matches, valid = counters['tables'].get(table, (0, 0, 0))
+        ipc['tables'][table] = [candidates, regex_matches, valid, kept_number, len(kept), len(table_records)]
+        ipc['kept'] += kept_number
+        ipc['with_keywords'] += len(kept)
+        ipc['decoded'] += len(table_records)
+
+    if ipc_stats:
+        ipc['results'] = len(pickle.dumps(records))
+    ipc['positions'], ipc['candidates'], ipc['regex_matches'], ipc['valid'] = counters['positions'], counters['candidates'], counters['matches'], counters['valid']
+
+    return records, ipc
+
+
+
+
+#Function that carves a window of a file for a scenario with the tables of several config files (see carve_window) : the window is only read once for all of them
+#Returns the records and statistics of each config file
+def carve_window_configs(mainfile, open_file, configfiles, scenario, start, end, ipc_stats=False, regions=None):
+    return [carve_window(mainfile, open_file, configfile, scenario, start, end, ipc_stats, regions) for configfile in configfiles]
+
+
+
+
+#Function that returns the compression ratio of a block (zlib, fastest level) : about 1 or more for random, compressed or encrypted data, much less for pages of records
+def compression_ratio(block):
+    return len(zlib.compress(block, 1)) / len(block)
+
+
+
+
+#Function that returns the kind of a file (see inventory_kinds) from its first bytes and from inventory_samples blocks spread over it, and the lowest compression ratio of its blocks (None if found from the first bytes) : 
+#sqlite (database header), wal (magic number of a WAL header), journal (magic number of a journal header, or header zeroed by journal_mode=PERSIST for a -journal file), zero-filled (every block is zeroed), 
+#high entropy (every block of inventory_block_size bytes is not compressible, e.g. video, archive or encrypted file, and no block contains a database header) or other
+def sniff_file(path, size):
+    if size == 0:
+        return 'zero-filled', None
+
+    with open(path, 'rb') as file:
+        head = file.read(inventory_block_size)
+        if head.startswith(sqlite_magic):
+            return 'sqlite', None
+        if head[:4] in wal_magics:
+            return 'wal', None
+        if head[:8] == journal_magic or (head[:28] == bytes(28) and os.path.basename(path).endswith('-journal')):
+            return 'journal', None
+
+        #Whole file if it is small, else blocks spread from its start to its end
+        if size <= inventory_samples * inventory_block_size:
+            data = head + file.read()
+            blocks = [data[offset:offset+inventory_block_size] for offset in range(0, len(data), inventory_block_size)]
+        else:
+            blocks = [head]
+            for sample in range(1, inventory_samples):
+                file.seek((size - inventory_block_size) * sample // (inventory_samples - 1))
+                blocks.append(file.read(inventory_block_size))
+
+    if all(block.count(0) == len(block) for block in blocks):
+        return 'zero-filled', None
+
+    ratios = [compression_ratio(block) for block in blocks if len(block) == inventory_block_size]
+    ratio = min(ratios) if ratios else None
+    if ratio is not None and ratio >= inventory_entropy_ratio and not any(sqlite_magic in block for block in blocks):
+        return 'high entropy', ratio
+
+    return 'other', ratio
+
+
+
+
+#Function that opens the index of the inventory (path, size, modification time, kind and lowest compression ratio of each file sniffed), in the cache directory or in memory without cache
+def open_inventory(index_path):
+    if index_path != ':memory:':
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    connection = sqlite3.connect(index_path)
+    connection.execute('CREATE TABLE IF NOT EXISTS %s (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, kind TEXT, ratio REAL)' % inventory_table)
+    return connection
+
+
+
+
+#Function that returns the kind of a file (see sniff_file) from the index of the inventory if the file was not modified since it was sniffed, else sniffs it and adds it to the index
+#Numbers of files of each kind, read from the index and sniffed are added up in inventory
+def file_kind(connection, path, file_stat, inventory):
+    path = os.path.abspath(path)
+    row = connection.execute('SELECT kind FROM %s WHERE path = ? AND size = ? AND mtime = ?' % inventory_table, (path, file_stat.st_size, file_stat.st_mtime_ns)).fetchone()
+    if row:
+        kind = row[0]
+        inventory['indexed'] += 1
+    else:
+        kind, ratio = sniff_file(path, file_stat.st_size)
+        connection.execute('INSERT OR REPLACE INTO %s VALUES (?, ?, ?, ?, ?)' % inventory_table, (path, file_stat.st_size, file_stat.st_mtime_ns, kind, ratio))
+        inventory['sniffed'] += 1
+        if inventory['sniffed'] % inventory_commit_size == 0:
+            connection.commit()
+
+    inventory['kinds'][kind] = inventory['kinds'].get(kind, 0) + 1
+    return kind
+
+
+
+
+#Function run by the discovery thread : walks the files and directories given as input and puts each file to carve in files_queue (found in a directory, name, path, size, config files to carve it for, kind), then None
+#With linked, a file is only carved for the config files whose database name is in its name (e.g. mmssms.db, mmssms.db-journal, mmssms.db-wal for config_mmssms.db.json), else for all config files
+#With inventory (numbers of files of each kind, index of the inventory), the kind of each file is read from the index or sniffed (file_kind), else the kind is None : the kind is only sniffed from samples of the file, so every file is carved
+def discover_files(inputs, config_files, linked, files_queue, inventory=None):
+    linked_files = [(configfile, configfile[configfile.find('config_') + len('config_'):configfile.find('.json')]) for configfile in config_files]
+    connection = open_inventory(inventory['index']) if inventory else None
+
+    try:
+        for input_path in inputs:
+            #If it's a directory, look for files inside (name of each file as carved_record_file)
+            if os.path.isdir(input_path):
+                for parent, dirnames, filenames in os.walk(input_path):
+                    for fn in filenames:
+                        file_configs = tuple(configfile for configfile, linked_file in linked_files if not linked or linked_file in fn)
+                        if file_configs:
+                            filepath = os.path.join(parent, fn)
+                            try:
+                                file_stat = os.stat(filepath)
+                                kind = file_kind(connection, filepath, file_stat, inventory) if connection else None
+                            #Broken link or file removed since the walk
+                            except OSError:
+                                continue
+                            if kind in inventory_deferred:
+                                inventory['deferred'] += 1
+                            files_queue.put((True, fn, filepath, file_stat.st_size, file_configs, kind))
+            #If it's a file (path as carved_record_file)
+            elif os.path.isfile(input_path):
+                file_configs = tuple(configfile for configfile, linked_file in linked_files if not linked or linked_file in input_path)
+                for configfile, linked_file in linked_files:
+                    if configfile not in file_configs:
+                        print('\n\n', str(configfile), 'is not linked to', str(input_path), '\n\n')
+                if file_configs:
+                    file_stat = os.stat(input_path)
+                    kind = file_kind(connection, input_path, file_stat, inventory) if connection else None
+                    if kind in inventory_deferred:
+                        inventory['deferred'] += 1
+                    files_queue.put((False, input_path, input_path, file_stat.st_size, file_configs, kind))
+            #Else, nor file nor directory
+            else:
+                print('\n\n', "Nor file(s) nor directory", '\n\n')
+    finally:
+        if connection:
+            connection.commit()
+            connection.close()
+        files_queue.put(None)
+
+
+
+
+#Function that asks the kernel to read ahead the first length bytes of a file (posix_fadvise WILLNEED), so that they are in the page cache when the workers carve it
+def prefetch_file(path, length):
+    if length <= 0 or not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+
+
+#Function that yields the files to carve (name, path, config files, kind) while a discovery thread walks the inputs (discover_files) : files of directories are yielded largest first among the next lookahead files discovered, 
+#so that the run does not end with a large file carved alone, files given as input in their order (after the files of the directories given before them)
+#With inventory, zero-filled and high entropy files of the directories are yielded after the other files among the next lookahead files discovered (their kind is sniffed from samples, so they are still carved)
+#The first prefetch_length bytes of the next file are read ahead while the current one is carved
+def ingest_files(inputs, config_files, linked, lookahead=ingest_lookahead, prefetch_length=0, inventory=None):
+    files_queue = queue.Queue(maxsize=lookahead)
+    discovery = threading.Thread(target=discover_files, args=(inputs, config_files, linked, files_queue, inventory), daemon=True)
+    discovery.start()
+
+    #Files discovered, largest first (deferred kind, size, then order of discovery) : (deferred, -size, order, name, path, config files, kind)
+    heap, number, discovering = [], 0, True
+    while discovering or heap:
+
+        #Wait until lookahead files are discovered (or all of them), so that the order of the files does not depend on the speed of the discovery
+        while discovering and len(heap) < lookahead:
+            item = files_queue.get()
+            if item is None:
+                discovering = False
+            elif item[0]:
+                heapq.heappush(heap, (item[5] in inventory_deferred, -item[3], number, item[1], item[2], item[4], item[5]))
+                number += 1
+            else:
+                while heap:
+                    yield heapq.heappop(heap)[3:]
+                prefetch_file(item[2], prefetch_length)
+                yield item[1], item[2], item[4], item[5]
+
+        if heap:
+            mainfile, open_file, file_configs, kind = heapq.heappop(heap)[3:]
+            if heap:
+                prefetch_file(heap[0][4], prefetch_length)
+            yield mainfile, open_file, file_configs, kind
+
+
+
+
+#Function that collects a window submitted to the workers (state of its file, arguments and result of carve_window_configs) : for each config file, sends its records to the writer thread of its output database (outputs) 
+#with the checkpoint of the window, writes them to the results cache and adds up its statistics ; at the end of a file (window_args None), renames its results cache files, or sends the records read from the results cache
+def collect_window(state, window_args, result, outputs, ipc_volume, discarded, results_used, progress, stats=False):
+    file_checkpoint = state['checkpoint']
+
+    #End of the file
+    if window_args is None:
+        for configfile, config_state in state['configs'].items():
+            if config_state['cached']:
+                for records, window in read_results(config_state['results_path']):
+                    if file_checkpoint + window not in outputs[configfile]['done']:
+                        outputs[configfile]['queue'].put(([(table, values[:2] + (str(state['mainfile']),) + values[3:]) for table, values in records], file_checkpoint + window))
+                os.utime(config_state['results_path'])
+                results_used.append(config_state['results_path'])
+                if stats:
+                    print('\n', 'Records of %s for %s read from the results cache' % (state['mainfile'], outputs[configfile]['output_db']))
+
+            #Whole file carved : its cached records can be used
+            elif config_state['results_file']:
+                config_state['results_file'].close()
+                os.replace(config_state['results_file'].name, config_state['results_path'])
+                results_used.append(config_state['results_path'])
+
+        progress.update(1)
+        return
+
+    #Result of carve_window for each config file is a list of records per table : send them to the writer thread of the config file, with the checkpoint of the window
+    for configfile, (window_records, ipc) in zip(window_args[2], result.get()):
+        records = [record for table_records in window_records for record in table_records]
+        outputs[configfile]['queue'].put((records, file_checkpoint + tuple(window_args[3:6])))
+        if state['configs'][configfile]['results_file']:
+            pickle.dump((records, tuple(window_args[3:6])), state['configs'][configfile]['results_file'], protocol=pickle.HIGHEST_PROTOCOL)
+
+        #Add up volume of data sent back by workers, and counters and times of each stage of the window
+        add_window_metrics(outputs[configfile]['files_metrics'][file_checkpoint[0]], ipc, window_args[3])
+        for key in ipc_volume:
+            ipc_volume[key] += ipc[key]
+        for rule, number in ipc['discarded'].items():
+            discarded[rule] = discarded.get(rule, 0) + number
+
+    #Print time elapsed for each scenario processing
+    state['tasks'] += 1
+    while state['finished_scenarios'] < 6 and state['tasks'] >= state['scenarios_ends'][state['finished_scenarios']]:
+        print('\n', 'Finished processing scenario %s/5 - %s seconds' % (str(state['finished_scenarios']), (time.time() - start_time)))
+        state['finished_scenarios'] += 1
+
+
+
+
+#Function that opens (creates) an output database, its tables, the provenance table of the records if they are deduplicated (--dedup) and the checkpoints table with --resume
+#When resuming an interrupted run (--resume), the tables that already exist are kept
+def open_output_database(output_path, create_statements, dedup=False, resume=False):
+
+    #Connection to output database, used by the writer thread
+    connection = sqlite3.connect(output_path, isolation_level=None, check_same_thread=False)
+
+    #Performance improvements
+    #WAL journal : batches already committed are kept if the run is interrupted
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA locking_mode=EXCLUSIVE')
+    connection.execute("PRAGMA synchronous=OFF")
+
+
+    #CREATE tables
+    for create_statement in create_statements:
+        if resume:
+            create_statement = create_statement.replace('CREATE TABLE ', 'CREATE TABLE IF NOT EXISTS ', 1)
+
+        try:
+            connection.execute(create_statement)
+        except (sqlite3.OperationalError, sqlite3.IntegrityError) as e:
+            print('\n\n', 'sqlite error: ', e, '\n\n')
+
+    #Windows carved for a scenario in a file (path, size and modification time of the file), committed with their records
+    if resume:
+        connection.execute('CREATE TABLE IF NOT EXISTS %s (carved_file_path TEXT, carved_file_size INTEGER, carved_file_mtime INTEGER, carving_scenario_number INTEGER, window_start INTEGER, window_end INTEGER)' % checkpoints_table)
+
+    #Each occurrence of a record (file, offset, scenario, location), with the hash of the record and the table and id of the only row written for it
+    if dedup:
+        connection.execute('CREATE TABLE IF NOT EXISTS %s (carved_record_hash INTEGER, carved_record_table TEXT, carved_record_id INTEGER, carving_scenario_number TEXT, carved_record_offset INTEGER, carved_record_file TEXT, carved_record_page INTEGER, carved_record_frame INTEGER, carved_record_commit TEXT)' % provenance_table)
+        connection.execute('CREATE INDEX IF NOT EXISTS %s_hash ON %s (carved_record_hash)' % (provenance_table, provenance_table))
+
+    return connection
+
+
+
+
+#Function that returns True if a record really contains one of the keywords in one of its values (a keyword found in its payload can straddle two values)
+def record_contains(values, keywords):
+    keywords_bytes = [keyword.encode('utf-8') for keyword in keywords]
+    
+    for value in values:
+        if (isinstance(value, str) and any(keyword in value for keyword in keywords)) or (isinstance(value, bytes) and any(keyword in value for keyword in keywords_bytes)):
+            return True
+    
+    return False
+
+
+
+
+#Function that returns the checkpoints of an output database : (path, size, modification time of the file, scenario, window start, window end) of each window already carved
+def read_checkpoints(connection):
+    return set(connection.execute('SELECT carved_file_path, carved_file_size, carved_file_mtime, carving_scenario_number, window_start, window_end FROM %s' % checkpoints_table))
+
+
+
+
+#Function that inserts records (table, values) in the output database, with one prepared INSERT statement per table and executemany
+#Without location (--wal or --journal), the location columns at the end of the values are not inserted
+def insert_records(connection, insert_statements, records, location=True):
+
+    #Group records by table, keeping their order in each table
+    tables_records = {}
+    for table, values in records:
+        tables_records.setdefault(table, []).append(values if location else values[:-len(location_fields)])
+
+    #INSERT records
+    for table, values in tables_records.items():
+        try:
+            connection.executemany(insert_statements[table], values)
+        except (sqlite3.OperationalError, sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+            print('\n\n', 'sqlite error: ', e, '\n\n')
+
+
+
+
+#Function that returns the hash of a record (signed 64 bits, as a SQLite INTEGER) : its table and the values of its columns, information and location columns excluded
+def record_hash(table, values):
+    digest = hashlib.blake2b(repr((table, values[3:-len(location_fields)])).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+
+
+#Function that returns the state of the deduplication of the records written to an output database : bloom filter of the hashes of the records, 
+#hashes of the last unique records (table and id of their row), id of the next row of each table, and number of unique records and duplicates written
+#Hashes of the records already in the provenance table (output database of an interrupted run) are added to the bloom filter
+def dedup_state(connection, insert_statements):
+    dedup = {'bloom':bytearray(dedup_bloom_size), 'recent':OrderedDict(), 'next_ids':{}, 'unique':0, 'duplicates':0}
+    
+    for table in insert_statements:
+        dedup['next_ids'][table] = connection.execute('SELECT COALESCE(MAX(carved_record_id), 0) + 1 FROM %s' % table).fetchone()[0]
+    for (hash_value,) in connection.execute('SELECT DISTINCT carved_record_hash FROM %s' % provenance_table):
+        bloom_add(dedup['bloom'], hash_value)
+    
+    return dedup
+
+
+
+
+#Function that returns the 3 bits of the bloom filter of a hash
+def bloom_bits(bloom, hash_value):
+    hash_value &= 0xffffffffffffffff
+    bits = len(bloom) * 8
+    first, second = hash_value >> 32, hash_value & 0xffffffff
+    return [(first + n * second) % bits for n in range(3)]
+
+
+
+
+#Function that adds a hash to a bloom filter
+def bloom_add(bloom, hash_value):
+    for bit in bloom_bits(bloom, hash_value):
+        bloom[bit >> 3] |= 1 << (bit & 7)
+
+
+
+
+#Function that returns True if a hash may have been added to a bloom filter (False : it was never added)
+def bloom_contains(bloom, hash_value):
+    return all(bloom[bit >> 3] & (1 << (bit & 7)) for bit in bloom_bits(bloom, hash_value))
+
+
+
+
+#Function that inserts records (table, values) in the output database, only once per record (same table and values) : each occurrence is written to the provenance table
+#instead, with the table and id of the row of the record. Unique records are inserted with their id, one prepared INSERT statement per table and executemany (without location columns unless location)
+def insert_unique_records(connection, insert_statements, records, dedup, location=True):
+    tables_records, provenance, batch_ids = {}, [], {}
+    bloom, recent = dedup['bloom'], dedup['recent']
+
+    for table, values in records:
+        hash_value = record_hash(table, values)
+        record_id = None
+        #Name of the table in the output database, without the brackets escaping its name in the schema
+        table_name = table[1:-1] if table.startswith('[') and table.endswith(']') else table
+
+        #Record already written : in the last unique records or the records of this batch, else in the provenance table if the bloom filter lets it through
+        if bloom_contains(bloom, hash_value):
+            record_id = recent.get((table, hash_value)) or batch_ids.get((table, hash_value))
+            if record_id is None:
+                row = connection.execute('SELECT carved_record_id FROM %s WHERE carved_record_hash = ? AND carved_record_table = ? LIMIT 1' % provenance_table, (hash_value, table_name)).fetchone()
+                record_id = row[0] if row else None
+                
+        if record_id is None:
+            record_id = dedup['next_ids'][table]
+            dedup['next_ids'][table] += 1
+            tables_records.setdefault(table, []).append((record_id,) + (values if location else values[:-len(location_fields)]))
+            bloom_add(bloom, hash_value)
+            dedup['unique'] += 1
+        else:
+            dedup['duplicates'] += 1
+
+        batch_ids[(table, hash_value)] = record_id
+        recent[(table, hash_value)] = record_id
+        recent.move_to_end((table, hash_value))
+        if len(recent) > dedup_recent_size:
+            recent.popitem(last=False)
+
+        provenance.append((hash_value, table_name, record_id) + values[:3] + values[-len(location_fields):])
+
+    #INSERT unique records with their id, then their occurrences
+    for table, values in tables_records.items():
+        insert_statement = insert_statements[table].replace(' (', ' (carved_record_id, ', 1).replace('VALUES (', 'VALUES (?, ', 1)
+        try:
+            connection.executemany(insert_statement, values)
+        except (sqlite3.OperationalError, sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+            print('\n\n', 'sqlite error: ', e, '\n\n')
+    
+    connection.executemany('INSERT INTO %s VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)' % provenance_table, provenance)
+
+
+
+
+#Function that inserts a batch of records (only once per record if dedup is given) and the checkpoints of their windows, and commits them together
+def commit_batch(connection, insert_statements, batch, checkpoints, dedup=None, location=True):
+    if dedup:
+        insert_unique_records(connection, insert_statements, batch, dedup, location)
+    else:
+        insert_records(connection, insert_statements, batch, location)
+    
+    if checkpoints:
+        connection.executemany('INSERT INTO %s VALUES (?, ?, ?, ?, ?, ?)' % checkpoints_table, checkpoints)
+    connection.commit()
+
+
+
+
+#Function that inserts and commits a batch (commit_batch) and adds its rows and the wall time and CPU time of the insert to the metrics of the files of the batch (files_rows : rows per file path)
+#The time of the batch is split between its files according to their number of rows
+def commit_timed_batch(connection, insert_statements, batch, checkpoints, dedup, files_metrics, files_rows, location=True):
+    since = (time.perf_counter(), time.thread_time())
+    commit_batch(connection, insert_statements, batch, checkpoints, dedup, location)
+    wall, cpu = time.perf_counter() - since[0], time.thread_time() - since[1]
+
+    for path, rows in files_rows.items():
+        if path in files_metrics:
+            share = rows / max(len(batch), 1)
+            files_metrics[path]['rows_written'] += rows
+            times = files_metrics[path]['seconds'].setdefault('insert', {'wall':0.0, 'cpu':0.0})
+            times['wall'] += wall * share
+            times['cpu'] += cpu * share
+
+
+
+
+#Function run by the writer thread : inserts the records of each window received from the queue (records, checkpoint of the window), until None is received
+#Records are inserted and committed with the checkpoints of their windows (with checkpointing, i.e. --resume) every records_batch_size records (or checkpoint_interval seconds), only once per record if dedup (dedup_state) is given
+#Rows written and time of the inserts are added to the metrics of each file (files_metrics : metrics per file path, see file_metrics), location columns are only inserted with location (--wal or --journal)
+def write_records(connection, records_queue, insert_statements, keywords=None, dedup=None, files_metrics=None, checkpointing=False, location=True):
+    
+    #Records and checkpoints waiting to be inserted, and their number of rows per file
+    batch, checkpoints, files_rows = [], [], {}
+    files_metrics = files_metrics if files_metrics is not None else {}
+    last_commit = time.time()
+    connection.execute("BEGIN TRANSACTION")
+
+    while True:
+        window = records_queue.get()
+        
+        #End of the records
+        if window is None:
+            break
+        records, checkpoint = window
+        
+        #If keywords are provided as optionnal argument, make sure one of them is really present in the record (information and location columns excluded)
+        if keywords:
+            records = [record for record in records if record_contains(record[1][3:-len(location_fields)], keywords)]
+        
+        batch.extend(records)
+        if checkpointing:
+            checkpoints.append(checkpoint)
+        files_rows[checkpoint[0]] = files_rows.get(checkpoint[0], 0) + len(records)
+
+        #Insert and commit a batch of records
+        if len(batch) >= records_batch_size or time.time() - last_commit >= checkpoint_interval:
+            commit_timed_batch(connection, insert_statements, batch, checkpoints, dedup, files_metrics, files_rows, location)
+            connection.execute("BEGIN TRANSACTION")
+            batch, checkpoints, files_rows = [], [], {}
+            last_commit = time.time()
+
+    #Insert and commit last records
+    commit_timed_batch(connection, insert_statements, batch, checkpoints, dedup, files_metrics, files_rows, location)
+
+
+
+
+#Function that returns the metrics of a file carved for a config file : size, windows, kind (--inventory), numbers of each stage, rows written, wall time and CPU time of each stage ({stage: {'wall', 'cpu'}})
+#and numbers of each stage per table and scenario ({table: {scenario: {...}}})
+def file_metrics(configfile, open_file, size, windows_number, kind=None, results_cache=False):
+    return {'config':configfile, 'file':os.path.abspath(open_file), 'size':size, 'windows':windows_number, 'kind':kind, 'results_cache':results_cache, 'bytes_scanned':0, 
+            'candidates':0, 'regex_matches':0, 'valid':0, 'kept':0, 'with_keywords':0, 'decoded':0, 'rows_written':0, 'discarded':{}, 'seconds':{}, 'tables':{}}
+
+
+
+
+#Function that adds the statistics of a window carved for a scenario (see carve_window) to the metrics of its file
+def add_window_metrics(metrics, ipc, scenario):
+    metrics['bytes_scanned'] += ipc['positions']
+    for key in ('candidates', 'regex_matches', 'valid', 'kept', 'with_keywords', 'decoded'):
+        metrics[key] += ipc[key]
+    for rule, number in ipc['discarded'].items():
+        metrics['discarded'][rule] = metrics['discarded'].get(rule, 0) + number
+
+    for stage, (wall, cpu) in ipc['seconds'].items():
+        times = metrics['seconds'].setdefault(stage, {'wall':0.0, 'cpu':0.0})
+        times['wall'] += wall
+        times['cpu'] += cpu
+
+    for table, numbers in ipc['tables'].items():
+        table_metrics = metrics['tables'].setdefault(table, {}).setdefault(str(scenario), {'candidates':0, 'regex_matches':0, 'valid':0, 'kept':0, 'with_keywords':0, 'decoded':0})
+        for key, number in zip(('candidates', 'regex_matches', 'valid', 'kept', 'with_keywords', 'decoded'), numbers):
+            table_metrics[key] += number
+
+
+
+
+#Function that writes the metrics of the run and of each file (--metrics) : JSON, or CSV if the path ends with .csv (one row per metric : scope, config, file, table, scenario, metric, value)
+def write_metrics(metrics_path, metrics):
+    if not metrics_path.lower().endswith('.csv'):
+        with open(metrics_path, 'w') as metrics_file:
+            json.dump(metrics, metrics_file, indent=2)
+        return
+
+    rows = []
+    for key, value in metrics['run'].items():
+        if key == 'seconds':
+            rows += [('run', '', '', '', '', 'seconds.%s.%s' % (stage, clock), seconds) for stage, times in value.items() for clock, seconds in times.items()]
+        elif key in ('options', 'discarded', 'inventory'):
+            rows += [('run', '', '', '', '', '%s.%s' % (key, name), number) for name, number in value.items()]
+        elif key != 'outputs':
+            rows.append(('run', '', '', '', '', key, value))
+    for output in metrics['run']['outputs']:
+        rows += [('output', output['config'], '', '', '', key, value) for key, value in output.items() if key != 'config']
+
+    for file in metrics['files']:
+        for key, value in file.items():
+            if key == 'seconds':
+                rows += [('file', file['config'], file['file'], '', '', 'seconds.%s.%s' % (stage, clock), seconds) for stage, times in value.items() for clock, seconds in times.items()]
+            elif key == 'discarded':
+                rows += [('file', file['config'], file['file'], '', '', 'discarded.%s' % rule, number) for rule, number in value.items()]
+            elif key == 'tables':
+                rows += [('table', file['config'], file['file'], table, scenario, metric, number) for table, scenarios in value.items() for scenario, numbers in scenarios.items() for metric, number in numbers.items()]
+            elif key not in ('config', 'file'):
+                rows.append(('file', file['config'], file['file'], '', '', key, value))
+
+    with open(metrics_path, 'w', newline='') as metrics_file:
+        writer = csv.writer(metrics_file)
+        writer.writerow(['scope', 'config', 'file', 'table', 'scenario', 'metric', 'value'])
+        writer.writerows(rows)
+
+
+
+
+#Main function with command-line arguments 
+def main(args):
+
+    #Retrieve argument user provided for --linked, --page-map, --wal, --journal, --dedup, --resume and --inventory
+    linked = true_false(args.linked)
+    page_mapping = true_false(args.page_map)
+    wal_frames = true_false(args.wal)
+    journal_pages = true_false(args.journal)
+    deduplicate = true_false(args.dedup)
+    resuming = true_false(args.resume)
+    results_caching = true_false(args.results_cache)
+    inventorying = true_false(args.inventory)
+
+    #Keywords given with --keyword and --keywords-file (None if there is none)
+    keywords = read_keywords(args.keyword, args.keywords_file)
+
+    #Results cache directory (--results-cache) and options that change the records carved from a file, part of the key of its cached records (with the kind of the file found by --inventory, that decides the modes it is carved with)
+    results_dir = os.path.join(os.path.expanduser(args.cache_dir), 'results') if results_caching else None
+    results_options = (keywords, page_mapping, wal_frames, journal_pages, inventorying)
+    results_used = []
+
+    #Retrieve config.json file, files or directory of files given as input
+
+    #List of --config files and list of their paths
+    config_files, config_files_paths = [], []
+
+    #If it's a directory
+    if os.path.isdir(args.config[0]):
+        #Look for files inside
+        for parent, dirnames, filenames in os.walk(args.config[0]):
+            for fn in filenames:
+                #Search for every config.json file
+                if fn.startswith('config_') and fn.endswith('.json'):
+                    #For each config.json file, append their name to config_files list and path to config_files_paths list
+                    filepath = os.path.join(parent, fn)
+                    config_files.append(fn)
+                    config_files_paths.append(filepath)
+        #Convert the directory given as --config in a list of each config.json file path
+        args.config = config_files_paths
+    #If it's file(s)
+    elif os.path.isfile(args.config[0]):
+        #Append their name to config_files list
+        args.config = args.config
+    #Else, nor file nor directory
+    else:
+        print('\n\n', "Nor file(s) nor directory", '\n\n')
+
+
+
+    #Schemas cache directory (--cache-size 0 : no cache)
+    cache_dir = os.path.expanduser(args.cache_dir) if args.cache_size > 0 else None
+
+    #Load the schema of each config file once (regexes are only compiled by workers) : quits before starting any worker if a config file is not valid
+    schemas = {configfile:load_schema(configfile, cache_dir, compile_regexes=False) for configfile in args.config}
+    if cache_dir:
+        prune_schema_cache(cache_dir, args.cache_size, keep=[schema_cache_path(configfile, cache_dir) for configfile in args.config])
+
+    #Inventory of the input files (--inventory) : numbers of files of each kind, read from the index and sniffed, and deferred (zero-filled and high entropy), index in the cache directory (in memory without cache)
+    inventory = {'index':os.path.join(cache_dir, 'inventory.db') if cache_dir else ':memory:', 'kinds':{}, 'indexed':0, 'sniffed':0, 'deferred':0} if inventorying else None
+
+    #Number of worker processes : by default, usable CPUs - 1 (at least 1)
+    if args.workers:
+        workers = max(1, args.workers)
+    else:
+        workers = max(1, available_cpus()-1)
+
+    #Volume in bytes of pickled data sent between processes and number of positions, candidates, matches and records at each stage (--stats)
+    ipc_volume = {'matches':0, 'headers':0, 'records':0, 'results':0, 'positions':0, 'candidates':0, 'regex_matches':0, 'valid':0, 'kept':0, 'with_keywords':0, 'decoded':0}
+
+    #Number of matches discarded by each rule of the structural checks of the workers (--stats)
+    discarded = {}
+
+    #Metrics of the run and of each file carved for each config file (--metrics)
+    run_since = (time.perf_counter(), time.process_time())
+    metrics = {'run':{'started':time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'workers':workers, 'configs':len(args.config), 'files':0, 'size':0, 'bytes_scanned':0, 'candidates':0, 'regex_matches':0, 'valid':0, 'kept':0, 'with_keywords':0, 'decoded':0, 'rows_written':0, 'discarded':{}, 
+                      'options':{'window_size':args.window_size, 'keywords':len(keywords or []), 'prefilter':true_false(args.prefilter), 'page_map':page_mapping, 'wal':wal_frames, 'journal':journal_pages, 'dedup':deduplicate, 'resume':resuming, 'results_cache':results_caching, 'access':args.access, 'inventory':inventorying}, 
+                      'seconds':{}, 'outputs':[]}, 'files':[]}
+
+    #Start one pool of worker processes for the whole run, each worker loading the schemas once
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(args.config, keywords, cache_dir, true_false(args.prefilter), args.access)) as pool:
+
+        #If user didn't complete output path with final /
+        if not args.output.endswith("/"):
+            args.output += "/"
+
+
+
+
+        """"Search and decode record matches in file, write records to output database as they are carved"""
+
+        #For each config file provided as --config (can be in a directory), its output database and its tables are created first, then a writer thread inserts the records it receives from a bounded queue, committing them by batches
+        #Memory stays bounded whatever the size of the input, and records already committed are kept if the run is interrupted
+        #With --dedup, each record (same table and values) is written once, and each of its occurrences to the provenance table
+        #With --resume, the checkpoint of each window carved is committed with its records, and windows of the checkpoints of the output database are not carved again
+        #Tables have the location columns (page, frame, commit status) only with --wal or --journal
+        location = wal_frames or journal_pages
+        outputs = {}
+        try:
+            for configfile in args.config:
+                output_db = schemas[configfile]['output_db']
+                create_statements = schemas[configfile]['location_create_statements' if location else 'create_statements']
+                insert_statements = schemas[configfile]['location_insert_statements' if location else 'insert_statements']
+                records_queue = queue.Queue(maxsize=2*workers)
+                connection = open_output_database(args.output + output_db, create_statements, deduplicate, resuming)
+                done = read_checkpoints(connection) if resuming else set()
+                dedup = dedup_state(connection, insert_statements) if deduplicate else None
+                files_metrics = {}
+                writer = threading.Thread(target=write_records, args=(connection, records_queue, insert_statements, keywords, dedup, files_metrics, resuming, location))
+                writer.start()
+                outputs[configfile] = {'output_db':output_db, 'queue':records_queue, 'connection':connection, 'writer':writer, 'done':done, 'dedup':dedup, 'files_metrics':files_metrics}
+
+            #Files of the --input directories are discovered by a thread while the first ones are carved, and carved largest first (ingest_files)
+            #Each file is carved once for all the config files it is linked to (all of them without --linked) : each window is read once, then carved with the tables of every config file, whose records go to its output database
+            #With --inventory, zero-filled and high entropy files are carved after the others, and only databases are page mapped, WAL files read frame by frame and journals read page record by page record
+            #Windows of each file are submitted to the workers as soon as the file is prepared (page map, frames, page records), while the last windows of the previous files are carved : 
+            #pending holds the windows submitted and the end of each file, in order (state of the file, arguments of carve_window_configs or None for the end of the file, result)
+            pending = deque()
+            #tqdm for progress bar per file processment, its description is the output databases' names
+            progress = tqdm.tqdm(total=None if any(os.path.isdir(input_path) for input_path in args.input) else len(args.input), position=0, leave=True, desc=', '.join(output['output_db'] for output in outputs.values()))
+
+            try:
+                #For each file provided as input (or found in a directory provided as input), and the config files it is carved for
+                for mainfile, open_file, file_configs, kind in ingest_files(args.input, args.config, linked, ingest_lookahead, int(args.window_size * 1024 * 1024), inventory):
+
+                    #File checkpoints are for : path, size and modification time (a file modified since the interrupted run is carved again)
+                    size = os.path.getsize(open_file)
+                    file_checkpoint = (os.path.abspath(open_file), size, os.stat(open_file).st_mtime_ns)
+                    state = {'mainfile':mainfile, 'checkpoint':file_checkpoint, 'configs':{}, 'scenarios_ends':[], 'finished_scenarios':0, 'tasks':0}
+
+                    #Windows of the file (scenario, start, end[, regions]) and config files that still have to carve each of them, in order
+                    windows_configs = OrderedDict()
+
+                    #Variables to pass to carve_window function : the file is split in windows, carved in parallel for every scenario and all tables at once
+                    windows = scan_windows(size, int(args.window_size * 1024 * 1024))
+                    
+                    #Page map of a database (--page-map) : each window only searches the pages (or unallocated space and freeblocks) where records of the scenario can start
+                    #Frames of a WAL file (--wal) : each window only searches the page images of its frames, each page image once
+                    pages_map = page_map(worker_mmap(open_file)) if page_mapping and kind in (None, 'sqlite') else None
+                    frames_regions, frames_number = wal_regions(worker_mmap(open_file)) if wal_frames and kind in (None, 'wal') else (None, 0)
+                    if args.stats and pages_map:
+                        kinds = ', '.join('%s %s' % (pages_map[1].count(kind), page_kinds[kind]) for kind in range(len(page_kinds)))
+                        print('\n', 'Page map of %s: %s pages of %s bytes (%s)' % (mainfile, len(pages_map[1]), pages_map[0], kinds))
+                    if args.stats and frames_regions is not None:
+                        print('\n', 'WAL frames of %s: %s frames, %s different page images searched' % (mainfile, frames_number, len([region for region in frames_regions if region[3]])))
+
+                    for configfile in file_configs:
+                        output = outputs[configfile]
+                        config_state = {'cached':False, 'results_path':None, 'results_file':None}
+                        state['configs'][configfile] = config_state
+
+                        #Records of a file already carved with the same config.json, options and kind are read from the results cache (--results-cache) instead, if the whole file of the cache can be read (check_results), with the name of this file, at the end of the file
+                        results_path = results_cache_path(results_dir, open_file, configfile, results_options + (kind,)) if results_dir else None
+                        if results_path and check_results(results_path):
+                            output['files_metrics'][file_checkpoint[0]] = file_metrics(configfile, open_file, size, 0, kind, results_cache=True)
+                            metrics['files'].append(output['files_metrics'][file_checkpoint[0]])
+                            config_state.update({'cached':True, 'results_path':results_path})
+                            continue
+
+                        #Page records of a rollback journal (--journal) : each window only searches the pages of its page records, each page once (page size of the config file if the journal header is zeroed)
+                        records_regions, records_number = journal_regions(worker_mmap(open_file), schemas[configfile]['page_size']) if journal_pages and frames_regions is None and kind in (None, 'journal') else (None, 0)
+                        if pages_map or frames_regions is not None or records_regions is not None:
+                            config_windows = []
+                            for scenario in range(6):
+                                regions = scan_regions(size, pages_map, scenario) if pages_map else frames_regions if frames_regions is not None else records_regions
+                                for (start, end), regions_in_window in zip(windows, window_regions(regions, windows)):
+                                    if regions_in_window:
+                                        config_windows.append((scenario, start, end, regions_in_window))
+                            
+                            if args.stats and records_regions is not None:
+                                print('\n', 'Journal page records of %s: %s page records, %s different pages searched' % (mainfile, records_number, len([region for region in records_regions if region[3]])))
+                        else:
+                            config_windows = [(scenario, start, end) for scenario in range(6) for start, end in windows]
+
+                        #Windows already carved by an interrupted run (--resume)
+                        windows_number = len(config_windows)
+                        output['files_metrics'][file_checkpoint[0]] = file_metrics(configfile, open_file, size, windows_number, kind)
+                        metrics['files'].append(output['files_metrics'][file_checkpoint[0]])
+                        if output['done']:
+                            config_windows = [window for window in config_windows if file_checkpoint + tuple(window[:3]) not in output['done']]
+                            if args.stats and windows_number > len(config_windows):
+                                print('\n', 'Resuming %s for %s: %s/%s windows already carved' % (mainfile, output['output_db'], windows_number - len(config_windows), windows_number))
+
+                        #Records of each window written to the results cache (temporary file renamed once the whole file is carved), unless windows were carved by an interrupted run
+                        if results_path and len(config_windows) == windows_number:
+                            os.makedirs(results_dir, exist_ok=True)
+                            config_state.update({'results_path':results_path, 'results_file':open('%s.%s.tmp' % (results_path, os.getpid()), 'wb')})
+
+                        #Windows with the same regions are carved once for all config files (regions of a journal depend on the page size of the config file)
+                        for window in config_windows:
+                            windows_configs.setdefault(window[:3] + (schemas[configfile]['page_size'] if records_regions is not None else None,), (window, []))[1].append(configfile)
+
+                    #Arguments of carve_window_configs, in the order of the scenarios, and number of tasks until the end of each scenario
+                    all_windows_args = [(mainfile, open_file, tuple(window_configs), window[0], window[1], window[2], args.stats) + tuple(window[3:]) for window, window_configs in windows_configs.values()]
+                    all_windows_args.sort(key=lambda window_args: window_args[3])
+                    state['scenarios_ends'] = [len([window_args for window_args in all_windows_args if window_args[3] <= scenario]) for scenario in range(6)]
+
+                    #Carve each window of each scenario in parallel for all config files, workers only send back the records kept : the oldest window is collected before submitting more
+                    for window_args in all_windows_args + [None]:
+                        pending.append((state, window_args, pool.apply_async(carve_window_configs, window_args) if window_args else None))
+                        while len(pending) >= 2*workers:
+                            collect_window(*pending.popleft(), outputs, ipc_volume, discarded, results_used, progress, args.stats)
+
+                #Last windows of the last files
+                while pending:
+                    collect_window(*pending.popleft(), outputs, ipc_volume, discarded, results_used, progress, args.stats)
+
+            #Partial results of interrupted files are not kept
+            finally:
+                for state, window_args, result in pending:
+                    for config_state in state['configs'].values():
+                        if config_state['results_file'] and not config_state['results_file'].closed:
+                            config_state['results_file'].close()
+                            os.remove(config_state['results_file'].name)
+                progress.close()
+
+        #Commit last records and close connection to output databases, even if the run is interrupted
+        finally:
+            for output in outputs.values():
+                output['queue'].put(None)
+                output['writer'].join()
+                output['connection'].close()
+
+        for configfile, output in outputs.items():
+            if args.stats and output['dedup']:
+                print('\n', 'Records written to %s: %s unique records, %s duplicates (occurrences in %s)' % (output['output_db'], output['dedup']['unique'], output['dedup']['duplicates'], provenance_table))
+
+            output_metrics = {'config':configfile, 'output':args.output + output['output_db'], 'files':len(output['files_metrics']), 'rows_written':sum(file['rows_written'] for file in output['files_metrics'].values())}
+            if output['dedup']:
+                output_metrics.update({'unique':output['dedup']['unique'], 'duplicates':output['dedup']['duplicates']})
+            metrics['run']['outputs'].append(output_metrics)
+
+
+    #Remove least recently used results of other runs from the results cache
+    if results_dir:
+        prune_results_cache(results_dir, results_cache_size, keep=results_used)
+
+    #Totals of the run : files, bytes, numbers of each stage, rows written, wall time and CPU time of each stage (added up for all workers) and of the whole run (CPU time of the main process)
+    if args.metrics:
+        run = metrics['run']
+        for file in metrics['files']:
+            run['files'] += 1
+            for key in ('size', 'bytes_scanned', 'candidates', 'regex_matches', 'valid', 'kept', 'with_keywords', 'decoded', 'rows_written'):
+                run[key] += file[key]
+            for rule, number in file['discarded'].items():
+                run['discarded'][rule] = run['discarded'].get(rule, 0) + number
+            for stage, times in file['seconds'].items():
+                run_times = run['seconds'].setdefault(stage, {'wall':0.0, 'cpu':0.0})
+                run_times['wall'] += times['wall']
+                run_times['cpu'] += times['cpu']
+        if inventory:
+            run['inventory'] = dict([(kind, inventory['kinds'].get(kind, 0)) for kind in inventory_kinds] + [(key, inventory[key]) for key in ('indexed', 'sniffed', 'deferred')])
+        run['wall'] = time.perf_counter() - run_since[0]
+        run['cpu_main'] = time.process_time() - run_since[1]
+        write_metrics(args.metrics, metrics)
+
+
+    #Print volume of data sent back by workers, compared to separate find_matches, header decoding, filter_records and decode_record stages
+    if args.stats:
+        separate_stages = ipc_volume['matches'] + ipc_volume['headers'] + ipc_volume['records'] + ipc_volume['results']
+        print('\n', 'Data sent between processes: %s bytes (%s bytes with separate find/decode/filter/decode stages)' % (ipc_volume['results'], separate_stages))
+        
+        #Pass rate of each stage : prefilter (candidates/positions), record regex (matches/candidates), structural checks of the workers (valid/matches), keywords (records containing a keyword/kept), decode_record (decoded/kept)
+        stages = [('prefilter', 'positions', 'candidates'), ('regex', 'candidates', 'regex_matches'), ('structural checks', 'regex_matches', 'valid')]
+        stages += [('keywords', 'kept', 'with_keywords'), ('decode_record', 'with_keywords', 'decoded')] if keywords else [('decode_record', 'kept', 'decoded')]
+        for stage, before, after in stages:
+            rate = 100 * ipc_volume[after] / ipc_volume[before] if ipc_volume[before] else 0
+            print('\n', 'Pass rate of %s: %s/%s (%.4f %%)' % (stage, ipc_volume[after], ipc_volume[before], rate))
+
+        #Matches discarded by each rule of the structural checks (structure_rule)
+        for rule, number in sorted(discarded.items(), key=lambda item: -item[1]):
+            print('\n', 'Matches discarded by %s: %s' % (rule, number))
 
-        #Commit transactions and close connection to output database
-        connection.commit()
-        connection.close()
+        #Files of each kind of the inventory, and files carved after the others
+        if inventory:
+            kinds = ', '.join('%s %s' % (inventory['kinds'].get(kind, 0), kind) for kind in inventory_kinds)
+            print('\n', 'Inventory: %s files (%s), %s read from the index, %s sniffed, %s carved last (zero-filled or high entropy)' % (sum(inventory['kinds'].values()), kinds, inventory['indexed'], inventory['sniffed'], inventory['deferred']))
 
 
 
@@ -1481,13 +3074,29 @@ parser = argparse.ArgumentParser()
 parser.add_argument("-c", "--config", nargs='+', help='Provide one, multiple or a directory of config.json files generated by config.py, containing the main database schema.')
 parser.add_argument("-i", "--input", nargs='+', help='Provide all the files or a directory in which you want to search for records.')
 parser.add_argument("-l", "--linked", type=true_false, nargs='?', default=True, help='Parse only files linked with the database that was used to create config.json file. True or False, True by default. E.g. sms.db is linked with sms.db-wal but not with history.db-wal.')
-parser.add_argument("-k", "--keyword", nargs='?', required=False, help='Retrieve only records containing a certain word, e.g. -k http')
+parser.add_argument("-k", "--keyword", nargs='+', required=False, help='Retrieve only records containing one of these words, e.g. -k http ftp')
+parser.add_argument("-f", "--keywords-file", nargs='?', required=False, help='Retrieve only records containing one of the words of this file (one word per line, e.g. thousands of IOCs), with the words of --keyword.')
 parser.add_argument("-o", "--output", nargs='?', help='Output to save output_database.db file(s).')
-args = parser.parse_args()
+parser.add_argument("-s", "--window-size", type=float, nargs='?', default=64, help='Size in MB of the windows in which each file is split to be searched in parallel by the workers, 64 MB by default.')
+parser.add_argument("-t", "--stats", type=true_false, nargs='?', default=False, help='Print the volume of data sent back by the worker processes and the pass rate of each stage. True or False, False by default.')
+parser.add_argument("-m", "--page-map", type=true_false, nargs='?', default=False, help='For SQLite databases, search intact records only in table leaf, freelist and unparseable pages, deleted records only in freelist and unparseable pages, and both in the unallocated space and freeblocks of b-tree pages. True or False, False by default.')
+parser.add_argument("-a", "--wal", type=true_false, nargs='?', default=False, help='For WAL files, search records only in the page image of each frame (each different page image once), with the page number, frame number and commit status of the frame. True or False, False by default.')
+parser.add_argument("-j", "--journal", type=true_false, nargs='?', default=False, help='For rollback journal files, search records only in the page of each page record (each different page once), with the page number of the page record. True or False, False by default.')
+parser.add_argument("-u", "--dedup", type=true_false, nargs='?', default=False, help='Write each record (same table and values) only once, found in several files, offsets or scenarios, and each of its occurrences to the carved_records_provenance table. True or False, False by default.')
+parser.add_argument("-r", "--resume", type=true_false, nargs='?', default=False, help='Write the checkpoint of each window carved to the output database(s), and resume an interrupted run started with --resume and the same options : windows of the checkpoints are not carved again, records already written are kept. True or False, False by default.')
+parser.add_argument("-x", "--results-cache", type=true_false, nargs='?', default=False, help='Keep the records carved from each file in the cache directory, and read them back instead of carving again a file that did not change (same content, config.json file and options). True or False, False by default.')
+parser.add_argument("-d", "--cache-dir", nargs='?', default=os.path.join('~', '.cache', 'hiddenLite'), help='Directory of the cache of schemas (regexes generated from config.json files), ~/.cache/hiddenLite by default.')
+parser.add_argument("-e", "--cache-size", type=int, nargs='?', default=256, help='Maximum number of schemas kept in the cache, least recently used are removed. 256 by default, 0 to disable the cache.')
+parser.add_argument("-p", "--prefilter", type=true_false, nargs='?', default=True, help='Search records regexes only at the offsets whose bytes can start a record header of the table. True or False, True by default.')
+parser.add_argument("-g", "--metrics", nargs='?', required=False, help='Write the wall time and CPU time of each stage, bytes scanned, candidates per table and scenario, records kept and rows written, of the run and of each file, to this JSON file (CSV file if it ends with .csv).')
+parser.add_argument("-b", "--access", choices=['mmap', 'read', 'auto'], default='auto', help='Access of the workers to the files : mmap (memory map, read ahead with madvise), read (large reads of each window in a reused buffer, e.g. network or FUSE file systems) or auto (read for small files and network or FUSE file systems, else mmap). auto by default.')
+parser.add_argument("-n", "--inventory", type=true_false, nargs='?', default=False, help='Sniff each input file once (SQLite database, WAL, journal, zero-filled, high entropy, other), kept in an index of the cache directory : zero-filled and high entropy files (e.g. video, archive, encrypted) are carved after the other files, and only databases, WAL files and journals are read with --page-map, --wal and --journal. True or False, False by default.')
+parser.add_argument("-w", "--workers", type=int, nargs='?', required=False, help='Number of worker processes. By default, number of CPUs usable by the process (CPU affinity, cgroup quota) - 1, at least 1.')
 
 
 
 
 #Run main function with command-line arguments provided by user
 if __name__ == '__main__':
+    args = parser.parse_args()
     main(args)
\ No newline at end of file
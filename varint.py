@@ -0,0 +1,99 @@
+##########      varint.py     ##########
+"""
+SQLite varints and serial types decoding, shared by config.py and sqlite_parser.py.
+"""
+
+
+
+import struct
+
+
+
+
+#Lookup table of the length in bytes of the content of one-byte serial types (0-127), i.e. of almost all serial types of a record header
+#Serial types 8 and 9 are the integers 0 and 1 (no content), 10 and 11 are reserved and kept as they are, >= 12 are BLOB (even) and TEXT (odd)
+serial_types_lengths = tuple([0, 1, 2, 3, 4, 6, 8, 8, 0, 0, 10, 11] + [(serial_type-12) >> 1 for serial_type in range(12, 128)])
+
+
+
+
+#Function that translates a SQLite serial type into the length of its content
+def serial_type_length(serial_type):
+    if serial_type < 128:
+        return serial_types_lengths[serial_type]
+
+    return (serial_type-12) >> 1
+
+
+
+
+#Function that decodes the varint starting at offset in buffer and returns its value and the offset of the next byte
+#A varint takes 1 to 9 bytes : 7 bits per byte while the high bit is set, then all 8 bits of the 9th byte
+def read_varint(buffer, offset):
+    value = 0
+    end = min(offset+8, len(buffer))
+
+    for position in range(offset, end):
+        byte = buffer[position]
+        value = (value << 7) | (byte & 0x7f)
+        if byte < 128:
+            return value, position+1
+
+    #9th byte (or varint truncated by the end of the buffer)
+    if end == offset+8 and end < len(buffer):
+        return (value << 8) | buffer[end], end+1
+
+    return value, end
+
+
+
+
+#Function that decodes a whole record header from buffer[start:end] in one call
+#Returns unknown_header (start of the header as integers, then length of each column), unknown_header_2 (same but with serial types instead of lengths)
+#and limit (number of bytes from start before each serial type)
+def decode_header(buffer, start, end, len_start_header, freeblock=False):
+    unknown_header, unknown_header_2, limit = [], [], []
+    lengths = serial_types_lengths
+
+    #Bytes of the header, plus the 8 bytes that a varint starting on its last byte can take
+    header = buffer[start:end+8]
+    count = 0
+
+    #If the record is overwritten by a freeblock, 2 bytes (next freeblock offset) then 2 bytes (length of this freeblock)
+    if freeblock:
+        next_freeblock, freeblock_length = struct.unpack_from('>HH', header)
+        unknown_header += [next_freeblock, freeblock_length]
+        unknown_header_2 += [next_freeblock, freeblock_length]
+        count = 4
+
+    #Until end of the header
+    size = end-start
+    while count < size:
+
+        #Before serial types part (start header length): append(value) to unknown_header
+        if len(unknown_header) < len_start_header:
+            byte = header[count]
+            if byte < 128:
+                value = byte
+                count += 1
+            else:
+                value, count = read_varint(header, count)
+
+            unknown_header.append(value)
+            unknown_header_2.append(value)
+
+        #Serial types part : append(length) to unknown_header and serial type to unknown_header_2
+        else:
+            limit.append(count)
+
+            byte = header[count]
+            if byte < 128:
+                unknown_header.append(lengths[byte])
+                unknown_header_2.append(byte)
+                count += 1
+            else:
+                value, count = read_varint(header, count)
+                unknown_header.append(serial_type_length(value))
+                unknown_header_2.append(value)
+
+    return unknown_header, unknown_header_2, limit